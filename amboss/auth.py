@@ -1,10 +1,13 @@
 """Authentication and browser context management for AMBOSS scraper."""
 
+import asyncio
 import json
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 from playwright.async_api import Browser, BrowserContext, Page, async_playwright
+from playwright.async_api import Error as PlaywrightError
 from structlog import get_logger
 from tenacity import retry, stop_after_attempt, wait_exponential
 
@@ -12,6 +15,12 @@ from .config import settings
 
 logger = get_logger(__name__)
 
+# Process-wide browser and context reused by the debug tools
+_shared_auth: Optional["AuthManager"] = None
+_shared_context: Optional[BrowserContext] = None
+# Created on first use: on Python 3.9 a Lock binds to the loop current at creation
+_shared_lock: Optional[asyncio.Lock] = None
+
 
 class AuthManager:
     """Manages browser authentication and context creation."""
@@ -23,6 +32,13 @@ class AuthManager:
     async def __aenter__(self):
         """Async context manager entry."""
         self.playwright = await async_playwright().start()
+        
+        if settings.browser_ws_endpoint:
+            # Attach to a persistent browser server; close() only disconnects
+            self.browser = await self.playwright.chromium.connect(settings.browser_ws_endpoint)
+            logger.info("Connected to browser server", endpoint=settings.browser_ws_endpoint)
+            return self
+        
         self.browser = await self.playwright.chromium.launch(
             headless=True,
             args=[
@@ -69,10 +85,25 @@ class AuthManager:
             logger.error("Failed to load cookies", path=str(settings.cookie_path), error=str(e))
             raise
     
+    def has_fresh_storage_state(self) -> bool:
+        """Check whether the cached storage state exists and is within its TTL."""
+        path = settings.storage_state_path
+        if not path.exists():
+            return False
+        age = time.time() - path.stat().st_mtime
+        return age < settings.storage_state_ttl_hours * 3600
+    
+    async def save_storage_state(self, context: BrowserContext) -> None:
+        """Persist the context's cookies and local storage for later contexts."""
+        try:
+            settings.storage_state_path.parent.mkdir(parents=True, exist_ok=True)
+            await context.storage_state(path=str(settings.storage_state_path))
+            logger.info("Saved storage state", path=str(settings.storage_state_path))
+        except Exception as e:
+            logger.warning("Failed to save storage state", error=str(e))
+    
     async def create_context(self, **kwargs) -> BrowserContext:
         """Create a new browser context with authentication."""
-        cookies = self.load_cookies()
-        
         context_kwargs = {
             "viewport": {
                 "width": settings.viewport_width,
@@ -83,6 +114,12 @@ class AuthManager:
             **kwargs
         }
         
+        # Reuse the verified storage state so no cookie loading is needed
+        if "storage_state" not in context_kwargs and self.has_fresh_storage_state():
+            context_kwargs["storage_state"] = str(settings.storage_state_path)
+            return await self.browser.new_context(**context_kwargs)
+        
+        cookies = self.load_cookies()
         context = await self.browser.new_context(**context_kwargs)
         
         if cookies:
@@ -136,11 +173,13 @@ class AuthManager:
                     element = page.locator(indicator)
                     if await element.is_visible():
                         logger.info("Authentication verified successfully")
+                        await self._cache_verified_state(page)
                         return True
                 except:
                     continue
             
             # If we can access content without login prompts, assume we're authenticated
+            # Not positively confirmed, so don't cache this state for reuse
             logger.info("No login prompts found - assuming authenticated")
             return True
             
@@ -149,6 +188,11 @@ class AuthManager:
             # Don't raise, just return False to allow retry
             return False
     
+    async def _cache_verified_state(self, page: Page) -> None:
+        """Save the storage state after a successful check if the cache is stale."""
+        if not self.has_fresh_storage_state():
+            await self.save_storage_state(page.context)
+    
     async def _handle_cookie_consent(self, page: Page) -> None:
         """Handle cookie consent popups."""
         try:
@@ -213,6 +257,7 @@ class AuthManager:
                 state = await context.storage_state()
                 with open(settings.cookie_path, 'w', encoding='utf-8') as f:
                     json.dump(state, f, indent=2)
+                await self.save_storage_state(context)
                 
                 logger.info("Authentication refreshed successfully")
                 await context.close()
@@ -227,6 +272,135 @@ class AuthManager:
             return False
 
 
+class ContextPool:
+    """Pool of authenticated browser contexts shared by concurrent workers.
+    
+    Contexts are created lazily up to ``size`` and recycled after
+    ``max_pages`` pages to shed cookies and memory.
+    """
+    
+    def __init__(self, auth_manager: AuthManager, size: int, max_pages: int):
+        self.auth_manager = auth_manager
+        self.size = size
+        self.max_pages = max_pages
+        self.contexts: List[BrowserContext] = []
+        self._idle: "asyncio.Queue[BrowserContext]" = asyncio.Queue()
+        self._uses: Dict[BrowserContext, int] = {}
+        # Slots taken by existing contexts and by creations still in flight
+        self._slots = 0
+    
+    async def acquire(self) -> BrowserContext:
+        """Take a context from the pool, creating one while below size."""
+        if self._idle.empty() and self._slots < self.size:
+            # Reserve the slot before awaiting so concurrent callers can't overshoot
+            self._slots += 1
+            try:
+                context = await self.auth_manager.create_context()
+            except BaseException:
+                self._slots -= 1
+                raise
+            self.contexts.append(context)
+            self._uses[context] = 0
+            return context
+        return await self._idle.get()
+    
+    async def release(self, context: BrowserContext) -> None:
+        """Return a context to the pool, recycling it after max_pages pages."""
+        self._uses[context] += 1
+        
+        if self._uses[context] >= self.max_pages:
+            logger.debug("Recycling browser context", pages=self._uses[context])
+            context = await self._replace(context)
+        
+        self._idle.put_nowait(context)
+    
+    async def close(self) -> None:
+        """Close every context owned by the pool."""
+        for context in list(self.contexts):
+            await self._close(context)
+        self.contexts = []
+        self._uses = {}
+        self._slots = 0
+        self._idle = asyncio.Queue()
+    
+    async def _replace(self, context: BrowserContext) -> BrowserContext:
+        """Swap a context for a fresh one in the same slot."""
+        try:
+            replacement = await self.auth_manager.create_context()
+        except Exception as e:
+            # Keep serving the old context rather than losing the slot
+            logger.warning("Failed to recycle browser context", error=str(e))
+            self._uses[context] = 0
+            return context
+        
+        self.contexts[self.contexts.index(context)] = replacement
+        del self._uses[context]
+        self._uses[replacement] = 0
+        await self._close(context)
+        return replacement
+    
+    async def _close(self, context: BrowserContext) -> None:
+        """Close a context, ignoring failures."""
+        try:
+            await context.close()
+        except Exception as e:
+            logger.debug("Failed to close pooled context", error=str(e))
+
+
+async def close_page(page: Page) -> None:
+    """Close a page even if the calling task is being cancelled."""
+    try:
+        # Shielded so cancellation still frees the browser-side page
+        await asyncio.shield(page.close())
+    except PlaywrightError as e:
+        logger.debug("Failed to close page", error=str(e))
+
+
 async def get_auth_manager() -> AuthManager:
     """Get authentication manager instance."""
-    return AuthManager() 
\ No newline at end of file
+    return AuthManager() 
+
+
+def _get_shared_lock() -> asyncio.Lock:
+    """Return the lock guarding the shared browser, creating it in the running loop."""
+    global _shared_lock
+    if _shared_lock is None:
+        _shared_lock = asyncio.Lock()
+    return _shared_lock
+
+
+async def get_shared_auth() -> AuthManager:
+    """Get an AuthManager whose browser stays open for the whole process."""
+    global _shared_auth
+    async with _get_shared_lock():
+        if _shared_auth is None:
+            auth_manager = AuthManager()
+            await auth_manager.__aenter__()
+            _shared_auth = auth_manager
+        return _shared_auth
+
+
+async def get_shared_context() -> BrowserContext:
+    """Get a warm authenticated context shared by all callers in this process.
+    
+    Callers should close their pages but not the context; use
+    close_shared_auth() once at the end.
+    """
+    global _shared_context
+    auth_manager = await get_shared_auth()
+    async with _get_shared_lock():
+        if _shared_context is None:
+            _shared_context = await auth_manager.create_context()
+        return _shared_context
+
+
+async def close_shared_auth() -> None:
+    """Close the shared context and browser if they were started."""
+    global _shared_auth, _shared_context
+    async with _get_shared_lock():
+        if _shared_context is not None:
+            await _shared_context.close()
+            _shared_context = None
+        if _shared_auth is not None:
+            await _shared_auth.__aexit__(None, None, None)
+            _shared_auth = None
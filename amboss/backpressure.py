@@ -0,0 +1,245 @@
+"""Adaptive concurrency control for AMBOSS page navigation."""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Mapping, Optional
+
+from structlog import get_logger
+from tenacity import RetryCallState
+from tenacity.wait import wait_base
+
+logger = get_logger(__name__)
+
+
+class TransientError(Exception):
+    """Raised for navigation failures worth retrying (HTTP 5xx, 429)."""
+
+
+class RateLimited(TransientError):
+    """Raised when AMBOSS answers a navigation with HTTP 429."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # HTTP-date form is not used by AMBOSS; fall back to backoff
+        return None
+
+
+class wait_retry_after(wait_base):
+    """Tenacity wait strategy honouring the Retry-After of a RateLimited error."""
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        outcome = retry_state.outcome
+        if outcome is None or not outcome.failed:
+            return 0.0
+        exc = outcome.exception()
+        if isinstance(exc, RateLimited) and exc.retry_after:
+            return exc.retry_after
+        return 0.0
+
+
+class AIMD:
+    """Additive-increase/multiplicative-decrease concurrency controller.
+
+    The limit grows by ``increase`` after each navigation that finishes within
+    ``target_latency`` and is multiplied by ``decrease`` on errors or slow
+    responses. Repeated 429s open a circuit breaker that blocks new work for
+    ``breaker_cooldown`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        target_latency: float,
+        min_limit: float = 1.0,
+        increase: float = 0.5,
+        decrease: float = 0.5,
+        breaker_threshold: int = 3,
+        breaker_cooldown: float = 60.0,
+        poll_interval: float = 0.1
+    ):
+        self.max_limit = float(max_limit)
+        self.min_limit = float(min_limit)
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.poll_interval = poll_interval
+
+        self.limit = self.min_limit
+        self.active = 0
+        self._consecutive_rate_limits = 0
+        self._breaker_open_until = 0.0
+
+    async def __aenter__(self):
+        """Wait until a concurrency slot is available."""
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Release the concurrency slot."""
+        self.release()
+
+    async def acquire(self) -> None:
+        """Block while the breaker is open or the current limit is saturated."""
+        while True:
+            remaining = self._breaker_open_until - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+                continue
+            if self.active < int(self.limit):
+                self.active += 1
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    def release(self) -> None:
+        """Return a slot taken by acquire()."""
+        self.active = max(0, self.active - 1)
+
+    def on_success(self, latency: float) -> None:
+        """Record a completed navigation and its latency in seconds."""
+        self._consecutive_rate_limits = 0
+        if latency <= self.target_latency:
+            self.limit = min(self.max_limit, self.limit + self.increase)
+        else:
+            self._decrease()
+        logger.debug("AIMD success", latency=latency, limit=self.limit)
+
+    def on_error(self, rate_limited: bool = False, retry_after: Optional[float] = None) -> None:
+        """Record a failed navigation (timeout, 429, ...)."""
+        self._decrease()
+
+        if rate_limited:
+            self._consecutive_rate_limits += 1
+            cooldown = retry_after or 0.0
+            if self._consecutive_rate_limits >= self.breaker_threshold:
+                cooldown = max(cooldown, self.breaker_cooldown)
+                logger.warning("Circuit breaker opened after repeated 429s",
+                               count=self._consecutive_rate_limits,
+                               cooldown=cooldown)
+            if cooldown:
+                self._breaker_open_until = max(
+                    self._breaker_open_until, time.monotonic() + cooldown
+                )
+
+        logger.debug("AIMD error", rate_limited=rate_limited, limit=self.limit)
+
+    def _decrease(self) -> None:
+        """Apply the multiplicative decrease."""
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+
+
+class RateLimitWindow:
+    """Proactive throttle driven by the rate-limit headers of responses.
+    
+    Keeps a sliding window of request timestamps and pauses all workers, via
+    an ``asyncio.Event``, when a response carries ``Retry-After`` or reports
+    that the ``x-ratelimit-remaining`` budget is nearly spent.
+    """
+    
+    def __init__(self, default_limit: int, window: float = 60.0):
+        self.default_limit = default_limit
+        self.window = window
+        self._timestamps: Deque[float] = deque()
+        self._open = asyncio.Event()
+        self._open.set()
+        self._resume_at = 0.0
+        self._resume_handle: Optional[asyncio.TimerHandle] = None
+    
+    @property
+    def requests_in_window(self) -> int:
+        """Number of requests sent within the sliding window."""
+        self._trim(time.monotonic())
+        return len(self._timestamps)
+    
+    async def wait(self) -> None:
+        """Block while a pause is in effect, then record a request."""
+        await self._open.wait()
+        now = time.monotonic()
+        self._trim(now)
+        self._timestamps.append(now)
+    
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Inspect response headers and pause workers if required."""
+        retry_after = parse_retry_after(headers.get("retry-after"))
+        if retry_after:
+            self.pause(retry_after)
+            return
+        
+        remaining = _parse_int(headers.get("x-ratelimit-remaining"))
+        if remaining is None:
+            return
+        limit = _parse_int(headers.get("x-ratelimit-limit")) or self.default_limit
+        if remaining <= 2 or remaining < 0.1 * limit:
+            # Wait for the oldest request in the window to age out
+            now = time.monotonic()
+            self._trim(now)
+            delay = self.window - (now - self._timestamps[0]) if self._timestamps else self.window
+            logger.info("Rate limit budget low, pausing", remaining=remaining, limit=limit, delay=delay)
+            self.pause(delay)
+    
+    def pause(self, seconds: float) -> None:
+        """Block all workers for ``seconds`` unless a longer pause is active."""
+        resume_at = time.monotonic() + seconds
+        if resume_at <= self._resume_at:
+            return
+        
+        if self._resume_handle is not None:
+            self._resume_handle.cancel()
+        self._resume_at = resume_at
+        self._open.clear()
+        self._resume_handle = asyncio.get_running_loop().call_later(seconds, self._open.set)
+    
+    def _trim(self, now: float) -> None:
+        """Drop timestamps that fell out of the window."""
+        while self._timestamps and now - self._timestamps[0] > self.window:
+            self._timestamps.popleft()
+
+
+class TokenBucket:
+    """Token bucket enforcing a global request rate across workers.
+    
+    Tokens accrue at ``rate`` per second up to ``capacity`` while workers are
+    busy, so time already spent on a page counts against the next wait.
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        """Take one token, sleeping only for the part not yet accrued."""
+        # The lock queues waiters in FIFO order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    """Parse an integer header value, ignoring malformed input."""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
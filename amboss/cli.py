@@ -28,6 +28,7 @@ def setup_logging(log_level: str = "INFO", log_format: str = "json"):
     import structlog
     
     processors = [
+        structlog.contextvars.merge_contextvars,
         structlog.stdlib.filter_by_level,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
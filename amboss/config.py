@@ -1,6 +1,8 @@
 """Configuration management for AMBOSS scraper."""
 
 import os
+import re
+from functools import cached_property
 from pathlib import Path
 from typing import Optional
 
@@ -16,25 +18,36 @@ class Settings(BaseSettings):
         default=Path("secrets/auth_state.json"),
         description="Path to Playwright cookie state file"
     )
+    storage_state_path: Path = Field(
+        default=Path("secrets/storage_state.json"),
+        description="Path where the verified Playwright storage state is cached"
+    )
+    storage_state_ttl_hours: float = Field(default=12.0, description="Hours before the cached storage state is refreshed")
     
     # Browser settings
     viewport_width: int = Field(default=1280, description="Browser viewport width")
     viewport_height: int = Field(default=720, description="Browser viewport height")
     device_scale_factor: float = Field(default=2.0, description="Device scale factor for retina screenshots")
+    browser_ws_endpoint: Optional[str] = Field(default=None, description="WebSocket endpoint of a running `playwright run-server` to reuse instead of launching Chromium")
     
     # Rate limiting
     requests_per_minute: int = Field(default=30, description="Maximum requests per minute")
     min_delay: float = Field(default=2.0, description="Minimum delay between requests (seconds)")
     max_delay: float = Field(default=4.0, description="Maximum delay between requests (seconds)")
+    max_concurrency: int = Field(default=4, description="Maximum number of slugs processed concurrently")
+    context_max_pages: int = Field(default=50, description="Pages served by a pooled browser context before it is recycled")
+    navigation_target_latency: float = Field(default=8.0, description="Target page navigation latency for adaptive concurrency (seconds)")
     
     # Screenshot settings
     output_dir: Path = Field(default=Path("captures"), description="Output directory for screenshots")
     screenshot_format: str = Field(default="png", description="Screenshot format")
     screenshot_quality: int = Field(default=100, description="Screenshot quality (1-100)")
+    png_compress_level: int = Field(default=1, description="zlib level (0-9) for saved PNGs; low levels encode much faster")
     
     # Validation settings
     min_ocr_density: float = Field(default=0.95, description="Minimum OCR text density threshold")
     ocr_stddev_threshold: int = Field(default=20, description="OCR standard deviation threshold")
+    precise_density: bool = Field(default=False, description="Compute density over every pixel instead of a strided sample")
     
     # Database
     database_path: Path = Field(default=Path("amboss_scraper.db"), description="SQLite database path")
@@ -49,6 +62,7 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = Field(default="INFO", description="Logging level")
     log_format: str = Field(default="json", description="Log format (json or text)")
+    debug_screens: bool = Field(default=False, description="Save screenshots from debug scripts")
     
     # AMBOSS URLs
     base_url: str = Field(default="https://next.amboss.com", description="AMBOSS base URL")
@@ -61,6 +75,11 @@ class Settings(BaseSettings):
     max_expansion_attempts: int = Field(default=4, description="Maximum expansion attempts")
     expansion_delay: int = Field(default=400, description="Delay between expansion clicks (ms)")
     
+    @cached_property
+    def article_pattern_compiled(self) -> re.Pattern:
+        """Compiled article_pattern, shared instead of recompiling per module."""
+        return re.compile(self.article_pattern)
+    
     @field_validator("cookie_path")
     @classmethod
     def validate_cookie_path(cls, v: Path) -> Path:
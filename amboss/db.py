@@ -12,6 +12,13 @@ from .config import settings
 
 logger = get_logger(__name__)
 
+# Opens a run row, reopening it if the slug was already claimed in this run
+_OPEN_RUN_SQL = """
+    INSERT INTO runs (run_id, slug) VALUES (?, ?)
+    ON CONFLICT (run_id, slug) DO UPDATE SET
+        started = CURRENT_TIMESTAMP, finished = NULL, ok = NULL, error_msg = NULL
+"""
+
 
 class DatabaseManager:
     """Manages SQLite database operations."""
@@ -92,6 +99,98 @@ class DatabaseManager:
         async with self.conn.execute(query) as cursor:
             return await cursor.fetchall()
     
+    async def claim_pending_batch(
+        self, 
+        run_id: str, 
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, str]]:
+        """Atomically mark pending URLs as processing and open runs for them.
+        
+        Uses UPDATE ... RETURNING, which requires SQLite 3.35+.
+        """
+        async with self.conn.execute(
+            """
+            UPDATE urls SET status = 'processing'
+            WHERE slug IN (SELECT slug FROM urls WHERE status = 'pending' LIMIT ?)
+            RETURNING slug, url
+            """,
+            (limit if limit else -1,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        
+        await self.conn.executemany(
+            _OPEN_RUN_SQL,
+            [(run_id, slug) for slug, _ in rows]
+        )
+        await self.conn.commit()
+        return rows
+    
+    async def requeue_failed(
+        self, 
+        run_id: str, 
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, str]]:
+        """Move failed URLs straight back to processing and open runs for them."""
+        async with self.conn.execute(
+            """
+            UPDATE urls SET status = 'processing', last_error = NULL
+            WHERE slug IN (SELECT slug FROM urls WHERE status LIKE 'failed_%' LIMIT ?)
+            RETURNING slug, url
+            """,
+            (limit if limit else -1,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        
+        await self.conn.executemany(
+            _OPEN_RUN_SQL,
+            [(run_id, slug) for slug, _ in rows]
+        )
+        await self.conn.commit()
+        return rows
+    
+    async def finalize_batch(
+        self, 
+        run_id: str, 
+        results: List[Tuple[str, bool, Optional[str]]]
+    ) -> None:
+        """Apply terminal URL statuses and finish runs for a batch in one transaction."""
+        succeeded = [(slug,) for slug, ok, _ in results if ok]
+        failed = [(error, slug) for slug, ok, error in results if not ok]
+        
+        try:
+            await self.conn.executemany(
+                "UPDATE urls SET status = 'done' WHERE slug = ?",
+                succeeded
+            )
+            await self.conn.executemany(
+                "UPDATE urls SET status = 'failed_expansion', last_error = ?, retry_count = retry_count + 1 WHERE slug = ?",
+                failed
+            )
+            await self.conn.executemany(
+                "UPDATE runs SET finished = CURRENT_TIMESTAMP, ok = ?, error_msg = ? WHERE run_id = ? AND slug = ?",
+                [(ok, error, run_id, slug) for slug, ok, error in results]
+            )
+            await self.conn.commit()
+        except Exception:
+            await self.conn.rollback()
+            raise
+    
+    async def release_claims(self, run_id: str, slugs: List[str]) -> None:
+        """Return claimed URLs that never finished to pending and close their runs."""
+        try:
+            await self.conn.executemany(
+                "UPDATE urls SET status = 'pending' WHERE slug = ? AND status = 'processing'",
+                [(slug,) for slug in slugs]
+            )
+            await self.conn.executemany(
+                "UPDATE runs SET finished = CURRENT_TIMESTAMP, ok = 0, error_msg = 'Cancelled' WHERE run_id = ? AND slug = ?",
+                [(run_id, slug) for slug in slugs]
+            )
+            await self.conn.commit()
+        except Exception:
+            await self.conn.rollback()
+            raise
+    
     async def get_failed_urls(self) -> List[Tuple[str, str, str]]:
         """Get failed URLs for retry."""
         async with self.conn.execute(
@@ -142,6 +241,22 @@ class DatabaseManager:
         )
         await self.conn.commit()
     
+    async def add_images_bulk(
+        self, 
+        run_id: str, 
+        slug: str, 
+        rows: List[Tuple[str, int, str]]
+    ) -> None:
+        """Add all image records for a slug in a single transaction."""
+        if not rows:
+            return
+        
+        await self.conn.executemany(
+            "INSERT INTO images (run_id, slug, filename, idx, section_title) VALUES (?, ?, ?, ?, ?)",
+            [(run_id, slug, filename, idx, section_title) for filename, idx, section_title in rows]
+        )
+        await self.conn.commit()
+    
     async def get_run_images(self, run_id: str, slug: str) -> List[Tuple[str, int, str]]:
         """Get all images for a specific run."""
         async with self.conn.execute(
@@ -14,12 +14,15 @@ from .db import DatabaseManager
 
 logger = get_logger(__name__)
 
+# Simple regex to find href attributes
+_HREF_RE = re.compile(r'href=["\']([^"\']+)["\']')
+
 
 class URLDiscoverer:
     """Discovers AMBOSS article URLs through crawling."""
     
     def __init__(self):
-        self.slug_pattern = re.compile(settings.article_pattern)
+        self.slug_pattern = settings.article_pattern_compiled
         self.discovered_urls: Set[str] = set()
         self.session: Optional[aiohttp.ClientSession] = None
     
@@ -52,10 +55,8 @@ class URLDiscoverer:
         """Extract article slugs from HTML content using simple string splitting."""
         slugs = []
         # Simple approach: look for article URLs in the HTML
-        import re
         # Find all URLs that contain /article/ or /knowledge/
-        url_pattern = re.compile(r'https://next\.amboss\.com/de/(?:article|knowledge)/[a-zA-Z0-9\-]+')
-        for match in url_pattern.finditer(html):
+        for match in self.slug_pattern.finditer(html):
             full_url = match.group(0)
             if full_url not in self.discovered_urls:
                 self.discovered_urls.add(full_url)
@@ -64,11 +65,9 @@ class URLDiscoverer:
     
     def extract_links(self, html: str, base_url: str) -> List[str]:
         """Extract all links from HTML content."""
-        # Simple regex to find href attributes
-        href_pattern = re.compile(r'href=["\']([^"\']+)["\']')
         links = []
         
-        for match in href_pattern.finditer(html):
+        for match in _HREF_RE.finditer(html):
             href = match.group(1)
             
             # Skip external links, anchors, and non-HTTP links
@@ -3,7 +3,8 @@
 import asyncio
 from typing import List, Optional
 
-from playwright.async_api import Page
+from playwright.async_api import Locator, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from structlog import get_logger
 from tenacity import retry, stop_after_attempt, wait_exponential
 
@@ -12,6 +13,143 @@ from .config import settings
 logger = get_logger(__name__)
 
 
+# Clicks the global toggle if it would expand collapsed sections, waits a
+# frame for the DOM to update, counts sections and scrolls to the given offset
+_EXPAND_VERIFY_SCROLL_JS = """
+async (scrollY) => {
+    const count = (selector) => document.querySelectorAll(selector).length;
+    const hidden = '[data-e2e-test-id="section-content-is-hidden"]';
+    const toggle = document.querySelector('button[data-e2e-test-id="toggle-all-sections-button"]');
+    if (count(hidden) > 0 && toggle && toggle.querySelector('[data-e2e-test-id="expand"]')) {
+        toggle.click();
+        await new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+    }
+    const counts = {
+        expanded: count('[data-e2e-test-id="section-content-is-shown"]'),
+        collapsed: count(hidden)
+    };
+    window.scrollTo(0, scrollY);
+    return counts;
+}
+"""
+
+
+# Shared in-page scripts, kept as constants so every call sends the same source
+_CLICK_JS = "(element) => element.click()"
+_PAGE_HEIGHT_JS = "document.body.scrollHeight"
+
+# Indices of the visible elements among a locator's matches; same visibility
+# test as Playwright's is_visible()
+_VISIBLE_INDICES_JS = """
+(elements) => elements.flatMap((el, i) => {
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0
+        && getComputedStyle(el).visibility !== 'hidden' ? [i] : [];
+})
+"""
+
+# Timeout in ms for acting on a resolved match; a match removed or shifted by
+# an earlier click would otherwise wait out Playwright's 30s default
+_ACTION_TIMEOUT = 2000
+
+# Only click the global toggle while it offers to expand, never to collapse
+_CLICK_EXPAND_TOGGLE_JS = """
+(toggle) => {
+    if (toggle.querySelector('[data-e2e-test-id="expand"]')) toggle.click();
+}
+"""
+
+# Last-resort removal of every modal, overlay and high z-index fixed element
+_REMOVE_ALL_MODALS_JS = """
+() => {
+    // Remove all modal containers
+    const modals = document.querySelectorAll('#ds-modal, [class*="modal"], [class*="overlay"], [class*="popup"], [role="dialog"]');
+    modals.forEach(modal => {
+        modal.remove();
+    });
+
+    // Remove backdrop/overlay elements
+    const backdrops = document.querySelectorAll('[class*="backdrop"], [class*="overlay"], [class*="dim"]');
+    backdrops.forEach(backdrop => {
+        backdrop.remove();
+    });
+
+    // Remove any fixed positioned elements that might be blocking
+    const fixedElements = document.querySelectorAll('[style*="position: fixed"]');
+    fixedElements.forEach(el => {
+        if (el.style.zIndex && parseInt(el.style.zIndex) > 1000) {
+            el.remove();
+        }
+    });
+
+    // Enable scrolling
+    document.body.style.overflow = 'auto';
+    document.documentElement.style.overflow = 'auto';
+}
+"""
+
+# JavaScript fallback when clicking the #ds-modal close button fails
+_CLICK_DS_MODAL_CLOSE_JS = """
+() => {
+    const modal = document.querySelector('#ds-modal');
+    if (modal) {
+        const closeBtn = modal.querySelector('button[aria-label*="Close"], [data-testid*="close"]');
+        if (closeBtn) closeBtn.click();
+    }
+}
+"""
+
+# Remove #ds-modal and its backdrop when no close button exists
+_REMOVE_DS_MODAL_JS = """
+() => {
+    const modal = document.querySelector('#ds-modal');
+    if (modal) {
+        modal.remove();
+        // Also remove any backdrop
+        const backdrop = document.querySelector('[class*="backdrop"], [class*="overlay"]');
+        if (backdrop) backdrop.remove();
+    }
+}
+"""
+
+# Rendered once the article skeleton is in the DOM
+ARTICLE_READY_SELECTOR = 'section[data-e2e-test-id="section-with-header"], h1'
+
+# AMBOSS modal system plus generic dialogs
+MODAL_SELECTOR = '#ds-modal, [role="dialog"]'
+
+
+async def wait_for_article(page: Page, timeout: int = 5000) -> bool:
+    """Wait until the article skeleton has rendered; False on timeout."""
+    try:
+        await page.wait_for_selector(ARTICLE_READY_SELECTOR, timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        logger.debug("Article skeleton not rendered", url=page.url, timeout=timeout)
+        return False
+
+
+async def wait_for_modals_closed(page: Page, timeout: int = 2000) -> bool:
+    """Wait until no modal is visible after dismissing popups; False on timeout."""
+    try:
+        await page.locator(MODAL_SELECTOR).first.wait_for(state="hidden", timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        logger.debug("Modal still visible", url=page.url, timeout=timeout)
+        return False
+
+
+async def visible_elements(locator: Locator) -> List[Locator]:
+    """Return the visible matches, filtered in one ``evaluate_all`` round-trip.
+    
+    The returned locators are positional (``nth(i)``), so a click that removes
+    or re-renders a match shifts the later ones. Re-check ``is_visible()``
+    right before acting on each and pass a short ``timeout``.
+    """
+    indices = await locator.evaluate_all(_VISIBLE_INDICES_JS)
+    return [locator.nth(i) for i in indices]
+
+
 class ExpansionFailure(Exception):
     """Raised when content expansion fails."""
     pass
@@ -32,7 +170,7 @@ class ContentExpander:
             ".read-more-button"
         ]
     
-    @retry(stop=stop_after_attempt(4), wait=wait_exponential(multiplier=2))
+    @retry(stop=stop_after_attempt(4), wait=wait_exponential(multiplier=2), reraise=True)
     async def fully_expand(self, page: Page) -> None:
         """Expand all collapsed sections using multiple strategies."""
         logger.info("Starting content expansion")
@@ -87,33 +225,7 @@ class ContentExpander:
             logger.info("🧨 Nuclear modal removal...")
             
             # Remove all modals and overlays
-            await page.evaluate("""
-                () => {
-                    // Remove all modal containers
-                    const modals = document.querySelectorAll('#ds-modal, [class*="modal"], [class*="overlay"], [class*="popup"], [role="dialog"]');
-                    modals.forEach(modal => {
-                        modal.remove();
-                    });
-                    
-                    // Remove backdrop/overlay elements
-                    const backdrops = document.querySelectorAll('[class*="backdrop"], [class*="overlay"], [class*="dim"]');
-                    backdrops.forEach(backdrop => {
-                        backdrop.remove();
-                    });
-                    
-                    // Remove any fixed positioned elements that might be blocking
-                    const fixedElements = document.querySelectorAll('[style*="position: fixed"]');
-                    fixedElements.forEach(el => {
-                        if (el.style.zIndex && parseInt(el.style.zIndex) > 1000) {
-                            el.remove();
-                        }
-                    });
-                    
-                    // Enable scrolling
-                    document.body.style.overflow = 'auto';
-                    document.documentElement.style.overflow = 'auto';
-                }
-            """)
+            await page.evaluate(_REMOVE_ALL_MODALS_JS)
             
             await page.wait_for_timeout(1000)
             logger.info("✅ Nuclear modal removal completed")
@@ -203,30 +315,12 @@ class ContentExpander:
                     except Exception as e:
                         logger.warning(f"Click failed, trying JavaScript: {e}")
                         # JavaScript fallback
-                        await page.evaluate("""
-                            () => {
-                                const modal = document.querySelector('#ds-modal');
-                                if (modal) {
-                                    const closeBtn = modal.querySelector('button[aria-label*="Close"], button:has-text("×"), button:has-text("✕"), [data-testid*="close"]');
-                                    if (closeBtn) closeBtn.click();
-                                }
-                            }
-                        """)
+                        await page.evaluate(_CLICK_DS_MODAL_CLOSE_JS)
                         await page.wait_for_timeout(1000)
                 else:
                     logger.info("No close button found, using JavaScript to remove modal...")
                     # Nuclear option: Remove modal via JavaScript
-                    await page.evaluate("""
-                        () => {
-                            const modal = document.querySelector('#ds-modal');
-                            if (modal) {
-                                modal.remove();
-                                // Also remove any backdrop
-                                const backdrop = document.querySelector('[class*="backdrop"], [class*="overlay"]');
-                                if (backdrop) backdrop.remove();
-                            }
-                        }
-                    """)
+                    await page.evaluate(_REMOVE_DS_MODAL_JS)
                     await page.wait_for_timeout(1000)
             
             # Comprehensive popup selectors
@@ -312,14 +406,12 @@ class ContentExpander:
                 
                 for selector in close_selectors:
                     try:
-                        elements = page.locator(selector)
-                        count = await elements.count()
-                        for i in range(count):
-                            element = elements.nth(i)
-                            if await element.is_visible():
-                                await element.click()
-                                logger.info(f"Tier 3: Aggressive close with {selector}")
-                                await page.wait_for_timeout(500)
+                        for element in await visible_elements(page.locator(selector)):
+                            if not await element.is_visible():
+                                continue
+                            await element.click(timeout=_ACTION_TIMEOUT)
+                            logger.info(f"Tier 3: Aggressive close with {selector}")
+                            await page.wait_for_timeout(500)
                     except:
                         continue
                 
@@ -356,15 +448,13 @@ class ContentExpander:
                 
                 for selector in article_selectors:
                     try:
-                        elements = page.locator(selector)
-                        count = await elements.count()
-                        if count > 0:
-                            logger.info(f"Found {count} article navigation elements: {selector}")
+                        elements = await page.locator(selector).all()
+                        if elements:
+                            logger.info(f"Found {len(elements)} article navigation elements: {selector}")
                             
                             # Click the first visible link
-                            for i in range(count):
+                            for i, element in enumerate(elements):
                                 try:
-                                    element = elements.nth(i)
                                     if await element.is_visible():
                                         await element.click()
                                         await page.wait_for_load_state("domcontentloaded", timeout=10000)
@@ -401,20 +491,19 @@ class ContentExpander:
         # Then handle any remaining expansion buttons
         for selector in self.expand_selectors:
             try:
-                elements = page.locator(selector)
-                count = await elements.count()
+                elements = await visible_elements(page.locator(selector))
                 
-                if count > 0:
-                    logger.info(f"Found {count} elements with selector: {selector}")
+                if elements:
+                    logger.info(f"Found {len(elements)} elements with selector: {selector}")
                     
-                    # Click each element
-                    for i in range(count):
+                    # Click each element, one at a time for the UI animation
+                    for i, element in enumerate(elements):
                         try:
-                            element = elements.nth(i)
-                            if await element.is_visible():
-                                await element.click(force=True)
-                                await page.wait_for_timeout(settings.expansion_delay)
-                                logger.debug(f"Clicked element {i} with selector: {selector}")
+                            if not await element.is_visible():
+                                continue
+                            await element.click(force=True, timeout=_ACTION_TIMEOUT)
+                            await page.wait_for_timeout(settings.expansion_delay)
+                            logger.debug(f"Clicked element {i} with selector: {selector}")
                         except Exception as e:
                             logger.warning(f"Failed to click element {i} with selector {selector}", error=str(e))
                             continue
@@ -430,33 +519,34 @@ class ContentExpander:
             
             # Strategy 1: AMBOSS-specific section headers (primary approach)
             sections = page.locator('section[data-e2e-test-id="section-with-header"] div.cebd2a302a3552c4--headerContainer[role="button"]')
-            section_count = await sections.count()
+            visible_sections = await visible_elements(sections)
             
-            if section_count > 0:
-                logger.info(f"Found {section_count} AMBOSS sections to expand")
-                for i in range(section_count):
+            if visible_sections:
+                logger.info(f"Found {len(visible_sections)} AMBOSS sections to expand")
+                for i, section in enumerate(visible_sections):
                     try:
-                        section = sections.nth(i)
-                        if await section.is_visible():
-                            # Scroll section into view first
-                            await section.scroll_into_view_if_needed()
-                            await page.wait_for_timeout(500)
-                            
-                            # Try to click the section
+                        if not await section.is_visible():
+                            continue
+                        
+                        # Scroll section into view first
+                        await section.scroll_into_view_if_needed(timeout=_ACTION_TIMEOUT)
+                        await page.wait_for_timeout(500)
+                        
+                        # Try to click the section
+                        try:
+                            await section.click(timeout=5000)
+                            await page.wait_for_timeout(500)  # Wait for expansion animation
+                            logger.debug(f"Expanded section {i}")
+                        except Exception as click_error:
+                            logger.warning(f"Click failed for section {i}: {click_error}")
+                            # Try JavaScript click as fallback
                             try:
-                                await section.click(timeout=5000)
-                                await page.wait_for_timeout(500)  # Wait for expansion animation
-                                logger.debug(f"Expanded section {i}")
-                            except Exception as click_error:
-                                logger.warning(f"Click failed for section {i}: {click_error}")
-                                # Try JavaScript click as fallback
-                                try:
-                                    await page.evaluate("(element) => element.click()", section)
-                                    await page.wait_for_timeout(500)
-                                    logger.debug(f"Expanded section {i} via JavaScript")
-                                except Exception as js_error:
-                                    logger.warning(f"JavaScript click also failed for section {i}: {js_error}")
-                                    continue
+                                await section.evaluate(_CLICK_JS, timeout=_ACTION_TIMEOUT)
+                                await page.wait_for_timeout(500)
+                                logger.debug(f"Expanded section {i} via JavaScript")
+                            except Exception as js_error:
+                                logger.warning(f"JavaScript click also failed for section {i}: {js_error}")
+                                continue
                     except Exception as e:
                         logger.warning(f"Failed to expand section {i}: {e}")
                         continue
@@ -469,7 +559,7 @@ class ContentExpander:
                     
                     # Try JavaScript click on global toggle
                     try:
-                        await page.evaluate("(element) => element.click()", global_toggle_button)
+                        await global_toggle_button.first.evaluate(_CLICK_EXPAND_TOGGLE_JS)
                         await page.wait_for_timeout(2000)
                         logger.info("✅ Global toggle completed via JavaScript")
                     except Exception as js_error:
@@ -493,17 +583,16 @@ class ContentExpander:
             
             for selector in expand_selectors:
                 try:
-                    elements = page.locator(selector)
-                    count = await elements.count()
-                    if count > 0:
-                        logger.info(f"Found {count} expandable elements with selector: {selector}")
-                        for i in range(count):
+                    elements = await visible_elements(page.locator(selector))
+                    if elements:
+                        logger.info(f"Found {len(elements)} expandable elements with selector: {selector}")
+                        for i, element in enumerate(elements):
                             try:
-                                element = elements.nth(i)
-                                if await element.is_visible():
-                                    # Try JavaScript click
-                                    await page.evaluate("(element) => element.click()", element)
-                                    await page.wait_for_timeout(300)
+                                if not await element.is_visible():
+                                    continue
+                                # Try JavaScript click
+                                await element.evaluate(_CLICK_JS, timeout=_ACTION_TIMEOUT)
+                                await page.wait_for_timeout(300)
                             except Exception as e:
                                 logger.warning(f"Failed to expand element {i} with {selector}: {e}")
                                 continue
@@ -528,21 +617,35 @@ class ContentExpander:
             expanded_count = await expanded_sections.count()
             collapsed_count = await collapsed_sections.count()
             
-            if collapsed_count > 0:
-                logger.warning(f"Found {collapsed_count} collapsed sections - content not fully expanded!")
-                return False
-            
-            if expanded_count == 0:
-                logger.warning("No expanded sections found - content may not be loaded!")
-                return False
+            return self._check_section_counts(expanded_count, collapsed_count)
             
-            logger.info(f"✅ Content verified: {expanded_count} expanded sections")
-            return True
+        except Exception as e:
+            logger.error(f"Error verifying content expansion: {e}")
+            return False
+    
+    async def expand_verify_and_scroll(self, page: Page, scroll_y: int = 1000) -> bool:
+        """Toggle remaining sections open, verify expansion and scroll in one evaluate."""
+        try:
+            counts = await page.evaluate(_EXPAND_VERIFY_SCROLL_JS, scroll_y)
+            return self._check_section_counts(counts["expanded"], counts["collapsed"])
             
         except Exception as e:
             logger.error(f"Error verifying content expansion: {e}")
             return False
     
+    def _check_section_counts(self, expanded_count: int, collapsed_count: int) -> bool:
+        """Decide whether section counts indicate fully expanded content."""
+        if collapsed_count > 0:
+            logger.warning(f"Found {collapsed_count} collapsed sections - content not fully expanded!")
+            return False
+        
+        if expanded_count == 0:
+            logger.warning("No expanded sections found - content may not be loaded!")
+            return False
+        
+        logger.info(f"✅ Content verified: {expanded_count} expanded sections")
+        return True
+    
     async def _js_expansion_fallback(self, page: Page) -> None:
         """Use JavaScript to expand stubborn elements."""
         try:
@@ -622,20 +725,12 @@ class ContentExpander:
             total_hidden = 0
             for selector in hidden_selectors:
                 try:
-                    elements = page.locator(selector)
-                    count = await elements.count()
-                    if count > 0:
-                        # Check if any are actually visible (might be false positives)
-                        visible_count = 0
-                        for i in range(count):
-                            element = elements.nth(i)
-                            if await element.is_visible():
-                                visible_count += 1
+                    # Check if any are actually visible (might be false positives)
+                    visible_count = len(await visible_elements(page.locator(selector)))
+                    if visible_count > 0:
+                        total_hidden += visible_count
+                        logger.warning(f"Found {visible_count} still-visible elements with selector: {selector}")
                         
-                        if visible_count > 0:
-                            total_hidden += visible_count
-                            logger.warning(f"Found {visible_count} still-visible elements with selector: {selector}")
-                            
                 except Exception as e:
                     logger.warning(f"Error checking selector {selector}", error=str(e))
                     continue
@@ -682,7 +777,7 @@ class ContentExpander:
             metrics["remaining_expand_buttons"] = await expand_buttons.count()
             
             # Get page height
-            page_height = await page.evaluate("document.body.scrollHeight")
+            page_height = await page.evaluate(_PAGE_HEIGHT_JS)
             metrics["page_height"] = page_height
             
             return metrics
@@ -702,13 +797,7 @@ class ContentExpander:
                 return True
             
             # Check if any remaining buttons are actually visible
-            visible_count = 0
-            for i in range(count):
-                element = expand_buttons.nth(i)
-                if await element.is_visible():
-                    visible_count += 1
-            
-            return visible_count == 0
+            return not await visible_elements(expand_buttons)
             
         except Exception as e:
             logger.error("Error checking expansion status", error=str(e))
@@ -1,14 +1,14 @@
 """Fast AMBOSS article processor using existing URL list."""
 
 import asyncio
-import re
+import uuid
 from pathlib import Path
-from typing import List, Optional, Tuple
-from urllib.parse import urlparse
+from typing import Iterator, List, Optional, Tuple
 
 from structlog import get_logger
 
-from .auth import AuthManager
+from .auth import AuthManager, ContextPool, close_page
+from .backpressure import TokenBucket
 from .config import settings
 from .expander import ContentExpander, ExpansionFailure
 from .shooter import ScreenshotShooter
@@ -16,61 +16,79 @@ from .validator import ContentValidator, ValidationFailure
 
 logger = get_logger(__name__)
 
+# Lines written by the URL extractor ahead of the URL list
+_HEADERS = (b"AMBOSS All Article URLs", b"Generated on:", b"Total URLs:")
+
 
 class FastAMBOSSProcessor:
     """Fast processor for AMBOSS articles using existing URL list."""
     
     def __init__(self):
-        self.article_pattern = re.compile(r'https://next\.amboss\.com/de/article/([a-zA-Z0-9-]+)')
+        self.article_pattern = settings.article_pattern_compiled
         self.expander = ContentExpander()
         self.shooter = ScreenshotShooter()
         self.validator = ContentValidator()
         self.processed_count = 0
         self.success_count = 0
         self.failed_count = 0
+        # One bucket shared by all workers caps the global request rate
+        self.bucket = TokenBucket(rate=settings.requests_per_minute / 60)
         
-    def extract_urls_from_file(self, filename: str = "amboss_all_articles_links.txt") -> List[str]:
-        """Extract clean URLs from the existing file."""
+    def iter_urls(self, filename: str = "amboss_all_articles_links.txt") -> Iterator[str]:
+        """Yield clean, unique article URLs from the existing file, one line at a time."""
         logger.info("Reading URLs from file", filename=filename)
         
-        urls = []
+        # Each duplicate would cost a full page load and screenshot run
+        seen = set()
+        duplicates = 0
+        
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
+            # Parse raw bytes; only the URL itself is ever decoded
+            with open(filename, 'rb') as f:
                 for line in f:
                     line = line.strip()
                     # Skip header lines and empty lines
-                    if not line or line.startswith('AMBOSS All Article URLs') or line.startswith('Generated on:') or line.startswith('Total URLs:'):
+                    if not line or line.startswith(_HEADERS):
                         continue
                     
                     # Extract URL from numbered lines like "1. https://next.amboss.com/de/article/--0D-i - Pränataldiagnostik"
-                    if line[0].isdigit() and '. ' in line:
-                        url_part = line.split('. ')[1]
-                        if ' - ' in url_part:
-                            url = url_part.split(' - ')[0]
-                        else:
-                            url = url_part
+                    number, sep, rest = line.partition(b'. ')
+                    if sep and line[:1].isdigit():
+                        raw_url = rest.partition(b' - ')[0]
                     else:
                         # Direct URL line
-                        url = line
+                        raw_url = line
                     
-                    # Clean and validate URL
+                    # Validate, then drop any query string or fragment
+                    url = raw_url.decode('utf-8')
                     if self.article_pattern.match(url):
-                        # Remove any fragments
-                        parsed = urlparse(url)
-                        clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-                        urls.append(clean_url)
+                        url = url.split('#', 1)[0].split('?', 1)[0]
+                        if url in seen:
+                            duplicates += 1
+                            continue
+                        seen.add(url)
+                        yield url
             
-            logger.info("Extracted URLs from file", count=len(urls))
-            return urls
+            if duplicates:
+                logger.info("Skipped duplicate URLs", duplicates=duplicates, unique=len(seen))
             
         except FileNotFoundError:
             logger.error("URL file not found", filename=filename)
-            return []
         except Exception as e:
             logger.error("Error reading URL file", filename=filename, error=str(e))
-            return []
     
-    async def process_article(self, url: str, auth_manager: AuthManager) -> Tuple[bool, Optional[str]]:
+    def extract_urls_from_file(self, filename: str = "amboss_all_articles_links.txt") -> List[str]:
+        """Extract clean URLs from the existing file."""
+        urls = list(self.iter_urls(filename))
+        logger.info("Extracted URLs from file", count=len(urls))
+        return urls
+    
+    async def process_article(
+        self, 
+        url: str, 
+        auth_manager: AuthManager, 
+        context_pool: ContextPool
+    ) -> Tuple[bool, Optional[str]]:
         """Process a single article URL."""
         try:
             # Extract slug from URL
@@ -79,11 +97,18 @@ class FastAMBOSSProcessor:
                 return False, "Invalid URL format"
             
             slug = match.group(1)
+            
+            # Rate limiting - returns at once if earlier work used up the interval
+            await self.bucket.acquire()
             logger.info("Processing article", slug=slug, url=url)
             
-            # Create browser context
-            context = await auth_manager.create_context()
-            page = await context.new_page()
+            # Reuse a pooled context; only the page is created per article
+            context = await context_pool.acquire()
+            try:
+                page = await context.new_page()
+            except Exception:
+                await context_pool.release(context)
+                raise
             
             try:
                 # Navigate to article
@@ -98,21 +123,22 @@ class FastAMBOSSProcessor:
                 
                 # Validate content
                 validation_result = await self.validator.validate_page(page)
-                if not validation_result.get('is_valid', False):
-                    return False, f"Validation failed: {validation_result.get('issues', [])}"
+                if not validation_result.get('validation_passed', False):
+                    return False, f"Validation failed: {validation_result.get('errors', [])}"
                 
-                # Capture screenshots
-                output_dir = settings.output_dir / slug / f"run_{self.processed_count}"
-                output_dir.mkdir(parents=True, exist_ok=True)
-                
-                screenshots = await self.shooter.shoot_sections(page, slug, f"run_{self.processed_count}", output_dir)
+                # Capture screenshots; the shooter creates <output_dir>/<slug>/<run_id>
+                screenshots = await self.shooter.shoot_sections(
+                    page, slug, uuid.uuid4().hex, settings.output_dir
+                )
                 
                 logger.info("Article processed successfully", slug=slug, screenshots=len(screenshots))
                 return True, None
                 
             finally:
-                await page.close()
-                await context.close()
+                try:
+                    await close_page(page)
+                finally:
+                    await context_pool.release(context)
                 
         except ExpansionFailure as e:
             logger.warning("Expansion failed", slug=slug, error=str(e))
@@ -132,40 +158,53 @@ class FastAMBOSSProcessor:
             urls = urls[:limit]
             logger.info("Limited URLs for processing", limit=limit, actual_count=len(urls))
         
+        # Create the output root once rather than per article
+        settings.output_dir.mkdir(parents=True, exist_ok=True)
+        
         # Initialize auth manager
         async with AuthManager() as auth_manager:
-            # Verify authentication first
-            context = await auth_manager.create_context()
-            page = await context.new_page()
-            try:
-                if not await auth_manager.verify_auth(page):
-                    raise Exception("Authentication failed - cannot access AMBOSS")
-                logger.info("Authentication verified")
-            finally:
-                await page.close()
-                await context.close()
+            context_pool = ContextPool(
+                auth_manager,
+                size=settings.max_concurrency,
+                max_pages=settings.context_max_pages
+            )
             
-            # Process articles with rate limiting
-            for i, url in enumerate(urls):
-                self.processed_count += 1
-                
-                success, error = await self.process_article(url, auth_manager)
+            try:
+                # Verify authentication first
+                context = await context_pool.acquire()
+                page = await context.new_page()
+                try:
+                    if not await auth_manager.verify_auth(page):
+                        raise Exception("Authentication failed - cannot access AMBOSS")
+                    logger.info("Authentication verified")
+                finally:
+                    await page.close()
+                    await context_pool.release(context)
                 
-                if success:
-                    self.success_count += 1
-                else:
-                    self.failed_count += 1
-                    logger.warning("Article processing failed", url=url, error=error)
+                # Process articles concurrently, one pooled context per slot
+                semaphore = asyncio.Semaphore(settings.max_concurrency)
                 
-                # Rate limiting - wait between requests
-                if i < len(urls) - 1:  # Don't wait after the last one
-                    delay = settings.min_delay + (settings.max_delay - settings.min_delay) * (i % 10) / 10
-                    logger.debug("Rate limiting delay", delay=delay)
-                    await asyncio.sleep(delay)
+                async def _guarded(url: str) -> None:
+                    async with semaphore:
+                        success, error = await self.process_article(url, auth_manager, context_pool)
+                        
+                        # Counters are only touched between awaits, so no lock is needed
+                        self.processed_count += 1
+                        if success:
+                            self.success_count += 1
+                        else:
+                            self.failed_count += 1
+                            logger.warning("Article processing failed", url=url, error=error)
+                        
+                        # Progress update
+                        if self.processed_count % 10 == 0:
+                            logger.info("Processing progress", processed=self.processed_count, total=len(urls))
                 
-                # Progress update
-                if (i + 1) % 10 == 0:
-                    logger.info("Processing progress", processed=i + 1, total=len(urls))
+                await asyncio.gather(*(_guarded(url) for url in urls))
+            finally:
+                await context_pool.close()
+                # Screenshots are written in the background; finish them first
+                await self.shooter.close()
         
         result = {
             'total': len(urls),
@@ -176,4 +215,4 @@ class FastAMBOSSProcessor:
         }
         
         logger.info("Processing completed", **result)
-        return result 
\ No newline at end of file
+        return result
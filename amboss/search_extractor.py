@@ -1,12 +1,13 @@
 """Search results URL extractor for AMBOSS articles."""
 
 import asyncio
+import os
 import re
 from pathlib import Path
-from typing import List, Set
-from urllib.parse import urlparse
+from typing import IO, List, Optional, Set
 
 from playwright.async_api import Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from structlog import get_logger
 from tenacity import retry, stop_after_attempt, wait_exponential
 
@@ -15,12 +16,55 @@ from .config import settings
 
 logger = get_logger(__name__)
 
+_ARTICLE_LINK_SELECTOR = "a[href*='/de/article/']"
+
+# Compiled once; its source is also handed to the browser-side filter
+_ARTICLE_RE = re.compile(r'https://next\.amboss\.com/de/article/([a-zA-Z0-9-]+)')
+
+# Collects article links, strips query/fragment and dedupes inside the browser.
+# URLs already returned by an earlier call on the same page are skipped.
+_EXTRACT_ARTICLE_URLS_JS = """
+(source) => {
+    const pattern = new RegExp('^' + source);
+    const seen = window.__ambossSeenArticleUrls ||= new Set();
+    const urls = [];
+    for (const link of document.querySelectorAll("a[href*='/de/article/']")) {
+        if (pattern.test(link.href)) {
+            const url = new URL(link.href);
+            const clean = url.origin + url.pathname;
+            if (!seen.has(clean)) {
+                seen.add(clean);
+                urls.push(clean);
+            }
+        }
+    }
+    return urls;
+}
+"""
+
+# Buffer size for streaming URLs to the output file
+_WRITE_BUFFER_SIZE = 64 * 1024
+
+# Resolves once more article links are present than the given count
+_MORE_ARTICLE_LINKS_JS = """
+(previous) => document.querySelectorAll("a[href*='/de/article/']").length > previous
+"""
+
 
 class SearchExtractor:
     """Extracts article URLs from AMBOSS search results page."""
 
+    article_pattern = _ARTICLE_RE
+
     def __init__(self):
-        self.article_pattern = re.compile(r'https://next\.amboss\.com/de/article/([a-zA-Z0-9-]+)')
+        self.load_more_selectors = (
+            "text='Mehr anzeigen'",
+            "text='Show more'",
+            "[data-testid='load-more-button']",
+            ".load-more-button",
+            "button:has-text('Mehr anzeigen')",
+            "button:has-text('Show more')"
+        )
         self.extracted_urls: Set[str] = set()
         self.auth_manager = None
 
@@ -36,17 +80,35 @@ class SearchExtractor:
             await self.auth_manager.__aexit__(exc_type, exc_val, exc_tb)
 
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=2))
-    async def extract_article_urls(self, search_url: str = "https://next.amboss.com/de/search?q=&v=article") -> List[str]:
-        """Extract all article URLs from the search results page."""
+    async def extract_article_urls(
+        self, 
+        search_url: str = "https://next.amboss.com/de/search?q=&v=article",
+        stream_file: Optional[str] = None
+    ) -> List[str]:
+        """Extract all article URLs from the search results page.
+        
+        If ``stream_file`` is given, URLs are appended to it (unsorted) as each
+        batch of results loads, so progress survives a crash.
+        """
         logger.info("Starting article URL extraction", url=search_url)
+        self.extracted_urls = set()
 
         # Create browser context
         context = await self.auth_manager.create_context()
         page = await context.new_page()
+        sink = None
 
         try:
-            # Navigate to search page
-            await page.goto(search_url, wait_until="networkidle")
+            # Opened inside the try so a bad path still closes the page and context
+            if stream_file:
+                sink = open(stream_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE)
+
+            # Navigate to search page; analytics beacons keep it from going network-idle
+            await page.goto(search_url, wait_until="domcontentloaded", timeout=8000)
+            try:
+                await page.wait_for_selector(_ARTICLE_LINK_SELECTOR, timeout=8000)
+            except PlaywrightTimeoutError:
+                logger.warning("No article links rendered on search page")
             logger.info("Loaded search page")
 
             # Verify authentication
@@ -54,61 +116,44 @@ class SearchExtractor:
                 raise Exception("Authentication failed - cannot access search page")
 
             # Expand all results by clicking "Mehr anzeigen" until no more
-            await self._expand_all_results(page)
+            await self._expand_all_results(page, sink)
 
-            # Extract all article URLs
-            urls = await self._extract_urls_from_page(page)
+            # Pick up anything not yet collected during expansion
+            await self._collect_new_urls(page, sink)
+            urls = sorted(self.extracted_urls)
 
-            # Remove duplicates and fragments
-            clean_urls = self._clean_urls(urls)
+            logger.info("URL extraction completed", unique_clean=len(urls))
 
-            logger.info("URL extraction completed", 
-                       total_found=len(urls), 
-                       unique_clean=len(clean_urls))
-
-            return clean_urls
+            return urls
 
         finally:
+            if sink:
+                sink.close()
             await page.close()
             await context.close()
 
-    async def _expand_all_results(self, page: Page) -> None:
+    async def _expand_all_results(self, page: Page, sink: Optional[IO[str]] = None) -> None:
         """Click 'Mehr anzeigen' until all results are visible."""
         logger.info("Expanding all search results")
 
         max_attempts = 50  # Prevent infinite loops
         attempts = 0
-        last_count = 0
+        last_count = await self._count_article_links(page)
+        
+        # Locators are lazy, so build them once and reuse them every attempt
+        buttons = [(selector, page.locator(selector)) for selector in self.load_more_selectors]
 
         while attempts < max_attempts:
             try:
                 # Look for "Mehr anzeigen" button
-                mehr_anzeigen_selectors = [
-                    "text='Mehr anzeigen'",
-                    "text='Show more'",
-                    "[data-testid='load-more-button']",
-                    ".load-more-button",
-                    "button:has-text('Mehr anzeigen')",
-                    "button:has-text('Show more')"
-                ]
-
                 button_found = False
-                for selector in mehr_anzeigen_selectors:
+                for selector, button in buttons:
                     try:
-                        button = page.locator(selector)
                         if await button.is_visible():
-                            # Scroll button into view
-                            await button.scroll_into_view_if_needed()
-                            await page.wait_for_timeout(500)
-
-                            # Click the button
+                            # Click the button (Playwright scrolls it into view)
                             await button.click()
                             logger.info(f"Clicked 'Mehr anzeigen' button (attempt {attempts + 1})")
                             
-                            # Wait for new content to load
-                            await page.wait_for_load_state("networkidle")
-                            await page.wait_for_timeout(1000)  # Additional wait for dynamic content
-                            
                             button_found = True
                             break
                     except Exception as e:
@@ -119,13 +164,19 @@ class SearchExtractor:
                     logger.info("No more 'Mehr anzeigen' buttons found - all results loaded")
                     break
 
-                # Check if we're making progress (optional)
-                current_count = await self._count_article_links(page)
-                if current_count == last_count:
+                # Wait until new results appear rather than for network idle
+                try:
+                    await page.wait_for_function(
+                        _MORE_ARTICLE_LINKS_JS, 
+                        arg=last_count, 
+                        timeout=3000
+                    )
+                except PlaywrightTimeoutError:
                     logger.info("No new results loaded, stopping expansion")
                     break
                 
-                last_count = current_count
+                last_count = await self._count_article_links(page)
+                await self._collect_new_urls(page, sink)
                 attempts += 1
 
             except Exception as e:
@@ -140,54 +191,35 @@ class SearchExtractor:
         """Count current article links on the page."""
         try:
             # Count links that match our article pattern
-            links = page.locator("a[href*='/de/article/']")
+            links = page.locator(_ARTICLE_LINK_SELECTOR)
             count = await links.count()
             return count
         except Exception as e:
             logger.debug("Error counting article links", error=str(e))
             return 0
 
+    async def _collect_new_urls(self, page: Page, sink: Optional[IO[str]] = None) -> None:
+        """Record newly visible article URLs and stream them to ``sink``."""
+        new_urls = await self._extract_urls_from_page(page)
+        self.extracted_urls.update(new_urls)
+        
+        if sink and new_urls:
+            sink.write("".join(f"{url}\n" for url in new_urls))
+            sink.flush()
+            os.fsync(sink.fileno())
+
     async def _extract_urls_from_page(self, page: Page) -> List[str]:
-        """Extract all article URLs from the current page content."""
+        """Extract article URLs not returned by a previous call on this page."""
         try:
-            # Get all href attributes from links
-            urls = await page.evaluate("""
-                () => {
-                    const links = document.querySelectorAll('a[href]');
-                    const urls = [];
-                    for (const link of links) {
-                        const href = link.href;
-                        if (href && href.includes('/de/article/')) {
-                            urls.push(href);
-                        }
-                    }
-                    return urls;
-                }
-            """)
-
-            logger.info(f"Found {len(urls)} article links on page")
+            urls = await page.evaluate(_EXTRACT_ARTICLE_URLS_JS, _ARTICLE_RE.pattern)
+
+            logger.info(f"Found {len(urls)} new article URLs on page")
             return urls
 
         except Exception as e:
             logger.error("Error extracting URLs from page", error=str(e))
             return []
 
-    def _clean_urls(self, urls: List[str]) -> List[str]:
-        """Clean URLs by removing fragments and duplicates."""
-        clean_urls = set()
-
-        for url in urls:
-            # Parse URL to remove fragments
-            parsed = urlparse(url)
-            clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-            
-            # Only include URLs that match our exact pattern
-            if self.article_pattern.match(url):
-                clean_urls.add(clean_url)
-
-        # Convert back to list and sort for consistent output
-        return sorted(list(clean_urls))
-
     async def save_urls_to_file(self, urls: List[str], output_file: str = "amboss-article-urls.md") -> None:
         """Save extracted URLs to a markdown file."""
         output_path = Path(output_file)
@@ -210,7 +242,8 @@ async def extract_and_save_urls(
 ) -> List[str]:
     """Convenience function to extract and save article URLs."""
     async with SearchExtractor() as extractor:
-        urls = await extractor.extract_article_urls(search_url)
+        # Stream while extracting, then rewrite the file sorted once complete
+        urls = await extractor.extract_article_urls(search_url, stream_file=output_file)
         await extractor.save_urls_to_file(urls, output_file)
         return urls
 
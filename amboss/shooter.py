@@ -1,10 +1,11 @@
 """Screenshot capture module for AMBOSS articles."""
 
 import asyncio
+import io
+import re
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from PIL import Image
 from playwright.async_api import Page
 from structlog import get_logger
 
@@ -12,6 +13,38 @@ from .config import settings
 
 logger = get_logger(__name__)
 
+# Characters that are not allowed in filenames on common filesystems
+_INVALID_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+_SCROLL_TO_JS = "(y) => window.scrollTo(0, y)"
+_PAGE_HEIGHT_JS = "document.body.scrollHeight"
+
+# Tallest capture in device pixels. Chromium truncates or blanks captures
+# beyond ~16384px, and each tile is decoded in full before cropping.
+_MAX_TILE_DEVICE_PX = 8192
+
+# Visible headers inside the content column, in document coordinates and
+# sorted top to bottom, together with the scrollable page height
+_SECTION_LAYOUT_JS = """
+([selector, left, right]) => {
+    const headers = [];
+    for (const el of document.querySelectorAll(selector)) {
+        const rect = el.getBoundingClientRect();
+        if (!rect.width || !rect.height || getComputedStyle(el).visibility === 'hidden') continue;
+        if (rect.left < left || rect.right > right) continue;
+        headers.push({y: rect.top + window.scrollY, title: (el.textContent || '').trim()});
+    }
+    headers.sort((a, b) => a.y - b.y);
+    return {headers, pageHeight: document.documentElement.scrollHeight};
+}
+"""
+
+
+def _load_pil_image():
+    """Import Pillow on first use; it is only needed once captures are processed."""
+    from PIL import Image
+    return Image
+
 
 class ScreenshotShooter:
     """Handles intelligent screenshot capture of article sections."""
@@ -23,21 +56,106 @@ class ScreenshotShooter:
             ".section-header",
             ".article-section"
         ]
+        # PNG files are written by a single background task so disk I/O
+        # overlaps with the next navigation; see wait_for_writes()/close()
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        # Write futures per output directory while shoot_sections runs
+        self._pending_writes: Dict[Path, List[asyncio.Future]] = {}
+    
+    async def wait_for_writes(self, writes: List[asyncio.Future]) -> None:
+        """Wait for the given queued writes and raise the first write error."""
+        results = await asyncio.gather(*writes, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+    
+    async def flush(self) -> None:
+        """Wait until every queued screenshot has been written to disk."""
+        if self._write_queue is not None:
+            await self._write_queue.join()
+    
+    async def close(self) -> None:
+        """Flush pending writes and stop the background writer."""
+        await self.flush()
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+            self._write_queue = None
+    
+    def _enqueue_write(self, filepath: Path, data: bytes) -> asyncio.Future:
+        """Queue PNG bytes for the background writer; the future resolves once on disk."""
+        if self._writer is None:
+            self._write_queue = asyncio.Queue()
+            self._writer = asyncio.create_task(self._drain_writes())
+        
+        # Check the encoded size up front; the file lands on disk later
+        if len(data) < 1024:  # Less than 1KB
+            logger.warning("Screenshot file seems too small", 
+                         filepath=str(filepath), 
+                         size=len(data))
+        
+        future = asyncio.get_running_loop().create_future()
+        # Mark failures as retrieved; callers that don't wait still get the log line
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._pending_writes.setdefault(filepath.parent, []).append(future)
+        self._write_queue.put_nowait((filepath, data, future))
+        return future
+    
+    async def _drain_writes(self) -> None:
+        """Write queued screenshots one at a time off the event loop."""
+        while True:
+            filepath, data, future = await self._write_queue.get()
+            try:
+                await asyncio.to_thread(filepath.write_bytes, data)
+            except Exception as e:
+                logger.error("Error writing screenshot", filepath=str(filepath), error=str(e))
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(None)
+            finally:
+                self._write_queue.task_done()
     
     async def shoot_sections(
         self, 
         page: Page, 
         slug: str, 
         run_id: str, 
-        outdir: Path
+        outdir: Path,
+        writes: Optional[List[asyncio.Future]] = None
     ) -> List[Tuple[str, int, str]]:
-        """Capture screenshots of all logical sections in the article."""
+        """Capture screenshots of all logical sections in the article.
+        
+        Files are written in the background. Pass a ``writes`` list to collect
+        one future per file and hand it to wait_for_writes() later.
+        """
         logger.info("Starting section screenshot capture", slug=slug, run_id=run_id)
         
         # Create output directory
         slug_dir = outdir / slug / run_id
         slug_dir.mkdir(parents=True, exist_ok=True)
         
+        try:
+            return await self._shoot_sections(page, slug, run_id, slug_dir)
+        finally:
+            futures = self._pending_writes.pop(slug_dir, [])
+            if writes is not None:
+                writes.extend(futures)
+    
+    async def _shoot_sections(
+        self, 
+        page: Page, 
+        slug: str, 
+        run_id: str, 
+        slug_dir: Path
+    ) -> List[Tuple[str, int, str]]:
+        """Pick a capture strategy for the article and queue its screenshots."""
         # Find the main content area first
         content_area = await self._find_content_area(page)
         if not content_area:
@@ -57,19 +175,7 @@ class ScreenshotShooter:
             logger.warning("No section headers found, capturing content area", slug=slug)
             return await self._capture_content_area(page, slug, run_id, slug_dir, content_area)
         
-        # Capture each section
-        captured_sections = []
-        for i, header in enumerate(headers):
-            try:
-                filename, section_title = await self._capture_section(
-                    page, header, i, slug_dir, content_area
-                )
-                captured_sections.append((filename, i, section_title))
-                logger.debug(f"Captured section {i}", title=section_title, filename=filename)
-                
-            except Exception as e:
-                logger.error(f"Failed to capture section {i}", error=str(e))
-                continue
+        captured_sections = await self._capture_sections(page, slug_dir, content_area)
         
         logger.info("Section capture completed", 
                    slug=slug, 
@@ -95,97 +201,136 @@ class ScreenshotShooter:
         
         return article_clip
     
-    async def _get_section_headers(self, page: Page, content_area: dict) -> List:
-        """Get all section headers from the content area."""
-        headers = []
+    async def _get_section_headers(self, page: Page, content_area: dict) -> List[dict]:
+        """Get all section headers from the content area, sorted by position."""
+        try:
+            layout = await self._get_section_layout(page, content_area)
+            return layout["headers"]
+        except Exception as e:
+            logger.warning("Error getting section headers", error=str(e))
+            return []
+    
+    async def _get_section_layout(self, page: Page, content_area: dict) -> dict:
+        """Measure every section header in a single evaluate call."""
+        return await page.evaluate(
+            _SECTION_LAYOUT_JS,
+            [
+                ", ".join(self.section_selectors),
+                content_area["x"],
+                content_area["x"] + content_area["width"]
+            ]
+        )
+    
+    async def _capture_sections(
+        self, 
+        page: Page, 
+        outdir: Path,
+        content_area: dict
+    ) -> List[Tuple[str, int, str]]:
+        """Capture all sections from a few tall screenshots of the content column."""
+        # Scroll down to reveal the full article content first
+        logger.info("Scrolling to reveal full article content")
+        await page.evaluate(_SCROLL_TO_JS, 1000)
+        await asyncio.sleep(2)
         
-        for selector in self.section_selectors:
+        # Measure after scrolling, since lazy content may have shifted headers
+        layout = await self._get_section_layout(page, content_area)
+        headers = layout["headers"]
+        spans = [
+            self._calculate_section_span(header["y"], i, layout["pageHeight"])
+            for i, header in enumerate(headers)
+        ]
+        
+        loop = asyncio.get_running_loop()
+        captured_sections = []
+        for tile_top, tile_bottom, indices in self._plan_tiles(spans):
             try:
-                elements = page.locator(selector)
-                count = await elements.count()
+                # One capture per tile; its sections are cropped from it
+                png = await page.screenshot(
+                    full_page=True,
+                    clip={
+                        "x": content_area["x"],
+                        "y": tile_top,
+                        "width": content_area["width"],
+                        "height": tile_bottom - tile_top
+                    },
+                    type="png"
+                )
                 
-                for i in range(count):
-                    element = elements.nth(i)
-                    if await element.is_visible():
-                        bbox = await element.bounding_box()
-                        if bbox:
-                            # Check if header is within content area
-                            if (bbox["x"] >= content_area["x"] and 
-                                bbox["x"] + bbox["width"] <= content_area["x"] + content_area["width"]):
-                                headers.append(element)
-                        
+                # Decoding, cropping and encoding are CPU-bound; keep them off the loop
+                sections = await loop.run_in_executor(
+                    None, 
+                    self._crop_sections, 
+                    png, 
+                    tile_top, 
+                    [(i, headers[i]["title"], spans[i]) for i in indices], 
+                    content_area["width"]
+                )
             except Exception as e:
-                logger.warning(f"Error getting headers with selector {selector}", error=str(e))
-                continue
-        
-        # Sort headers by their position on the page
-        sorted_headers = []
-        for header in headers:
-            try:
-                bbox = await header.bounding_box()
-                if bbox:
-                    sorted_headers.append((bbox["y"], header))
-            except:
+                # A failed tile only loses its own sections
+                logger.error("Failed to capture section tile", 
+                           tile_top=tile_top, 
+                           sections=indices, 
+                           error=str(e))
                 continue
-        
-        sorted_headers.sort(key=lambda x: x[0])
-        return [header for _, header in sorted_headers]
+            
+            for filename, i, section_title, data in sections:
+                self._enqueue_write(outdir / filename, data)
+                captured_sections.append((filename, i, section_title))
+        return captured_sections
     
-    async def _capture_section(
+    def _plan_tiles(
         self, 
-        page: Page, 
-        header, 
-        index: int, 
-        outdir: Path,
-        content_area: dict
-    ) -> Tuple[str, str]:
-        """Capture a single section starting from a header."""
-        try:
-            # Scroll down to reveal the full article content first
-            if index == 0:
-                logger.info("Scrolling to reveal full article content")
-                await page.evaluate("window.scrollTo(0, 1000)")
-                await asyncio.sleep(2)
-            
-            # Get header text for filename
-            header_text = await header.text_content()
-            if header_text:
-                header_text = self._sanitize_filename(header_text.strip())
+        spans: List[Tuple[float, float]]
+    ) -> List[Tuple[float, float, List[int]]]:
+        """Group section spans, top to bottom, into tiles short enough to capture."""
+        max_height = _MAX_TILE_DEVICE_PX / settings.device_scale_factor
+        
+        tiles = []
+        for i, (top, bottom) in enumerate(spans):
+            if tiles and bottom - tiles[-1][0] <= max_height:
+                tile_top, tile_bottom, indices = tiles[-1]
+                tiles[-1] = (tile_top, max(tile_bottom, bottom), indices + [i])
             else:
-                header_text = f"section_{index:03d}"
-            
-            # Scroll header into view
-            await header.scroll_into_view_if_needed()
-            await page.wait_for_timeout(500)  # Wait for scroll to complete
-            
-            # Get header bounding box
-            header_bbox = await header.bounding_box()
-            if not header_bbox:
-                raise ValueError("Could not get header bounding box")
-            
-            # Calculate capture area using content area bounds
-            clip = self._calculate_section_clip_with_content_area(
-                header_bbox, content_area, index
-            )
-            
-            # Capture screenshot
-            filename = f"sec_{index:03d}_{header_text}.png"
-            filepath = outdir / filename
-            
-            await page.screenshot(
-                path=str(filepath),
-                clip=clip,
-                type="png"
-            )
-            
-            # Post-process image
-            await self._post_process_image(filepath)
-            
-            return filename, header_text
+                tiles.append((top, bottom, [i]))
+        return tiles
+    
+    def _crop_sections(
+        self, 
+        png: bytes, 
+        tile_top: float, 
+        sections: List[Tuple[int, str, Tuple[float, float]]], 
+        width: int
+    ) -> List[Tuple[str, int, str, bytes]]:
+        """Crop and encode one PNG per section from a tile starting at ``tile_top``."""
+        Image = _load_pil_image()
+        
+        captured_sections = []
+        with Image.open(io.BytesIO(png)) as tile:
+            tile.load()
+            # Screenshot pixels per CSS pixel (device scale factor)
+            scale = tile.width / width
             
-        except Exception as e:
-            logger.error(f"Error capturing section {index}", error=str(e))
-            raise
+            for i, title, (top, bottom) in sections:
+                try:
+                    section_title = self._sanitize_filename(title) if title else f"section_{i:03d}"
+                    
+                    filename = f"sec_{i:03d}_{section_title}.png"
+                    crop = tile.crop((
+                        0, 
+                        round((top - tile_top) * scale), 
+                        tile.width, 
+                        round((bottom - tile_top) * scale)
+                    ))
+                    
+                    captured_sections.append((filename, i, section_title, self._encode_png(crop)))
+                    logger.debug(f"Captured section {i}", title=section_title, filename=filename)
+                    
+                except Exception as e:
+                    logger.error(f"Failed to capture section {i}", error=str(e))
+                    continue
+        
+        return captured_sections
     
     async def _capture_content_area(
         self, 
@@ -199,38 +344,34 @@ class ScreenshotShooter:
         try:
             # Scroll down to reveal the full article content
             logger.info("Scrolling to reveal full article content")
-            await page.evaluate("window.scrollTo(0, 1000)")
+            await page.evaluate(_SCROLL_TO_JS, 1000)
             await asyncio.sleep(2)
             
             # Calculate chunks based on content area height
             chunk_height = 1000  # Target chunk height
-            total_height = content_area["height"]
+            y_bottom = content_area["y"] + content_area["height"]
             chunks = []
             
             y_start = content_area["y"]
             chunk_index = 0
             
-            while y_start < content_area["y"] + total_height:
-                chunk_end = min(y_start + chunk_height, content_area["y"] + total_height)
-                chunk_height_actual = chunk_end - y_start
-                
-                clip = {
-                    "x": content_area["x"],
-                    "y": y_start,
-                    "width": content_area["width"],
-                    "height": chunk_height_actual
-                }
+            # Single clip dict reused for every chunk; only y/height change
+            clip = {
+                "x": content_area["x"],
+                "y": y_start,
+                "width": content_area["width"],
+                "height": 0
+            }
+            
+            while y_start < y_bottom:
+                chunk_end = min(y_start + chunk_height, y_bottom)
+                clip["y"] = y_start
+                clip["height"] = chunk_end - y_start
                 
                 filename = f"content_chunk_{chunk_index:03d}_{slug}.png"
-                filepath = outdir / filename
-                
-                await page.screenshot(
-                    path=str(filepath),
-                    clip=clip,
-                    type="png"
-                )
                 
-                await self._post_process_image(filepath)
+                png = await page.screenshot(clip=clip, type="png")
+                await self._queue_screenshot(outdir / filename, png)
                 chunks.append((filename, chunk_index, f"content_chunk_{chunk_index}"))
                 
                 y_start = chunk_end
@@ -252,16 +393,9 @@ class ScreenshotShooter:
         """Capture the full page when no content area is found."""
         try:
             filename = f"full_page_{slug}.png"
-            filepath = outdir / filename
             
-            await page.screenshot(
-                path=str(filepath),
-                type="png",
-                full_page=True
-            )
-            
-            # Post-process image
-            await self._post_process_image(filepath)
+            png = await page.screenshot(type="png", full_page=True)
+            await self._queue_screenshot(outdir / filename, png)
             
             return [(filename, 0, "full_page")]
             
@@ -269,34 +403,20 @@ class ScreenshotShooter:
             logger.error("Error capturing full page", error=str(e))
             raise
     
-    def _calculate_section_clip_with_content_area(
+    def _calculate_section_span(
         self, 
-        header_bbox: dict, 
-        content_area: dict, 
-        index: int
-    ) -> dict:
-        """Calculate the clip area for a section screenshot using content area bounds."""
+        header_y: float, 
+        index: int, 
+        page_height: float
+    ) -> Tuple[float, float]:
+        """Calculate the vertical document span for a section crop."""
         # Start capture slightly above the header for context
-        y_start = max(content_area["y"], header_bbox["y"] - 50)
+        y_start = max(0, header_y - 50)
         
-        # Calculate height - try to capture reasonable amount of content
         # For first section, capture more content
-        if index == 0:
-            height = min(1200, content_area["height"])
-        else:
-            height = min(1000, content_area["height"])
+        height = 1200 if index == 0 else 1000
         
-        # Ensure we don't go beyond content area bounds
-        max_y = content_area["y"] + content_area["height"]
-        y_end = min(y_start + height, max_y)
-        actual_height = y_end - y_start
-        
-        return {
-            "x": content_area["x"],
-            "y": y_start,
-            "width": content_area["width"],
-            "height": actual_height
-        }
+        return y_start, min(y_start + height, page_height)
     
     def _calculate_section_clip(
         self, 
@@ -324,10 +444,8 @@ class ScreenshotShooter:
     
     def _sanitize_filename(self, text: str) -> str:
         """Sanitize text for use in filename."""
-        import re
-        
         # Remove or replace invalid characters
-        sanitized = re.sub(r'[<>:"/\\|?*]', '_', text)
+        sanitized = _INVALID_FILENAME_CHARS.sub('_', text)
         
         # Limit length
         if len(sanitized) > 50:
@@ -338,28 +456,30 @@ class ScreenshotShooter:
         
         return sanitized or "section"
     
-    async def _post_process_image(self, filepath: Path) -> None:
-        """Post-process captured image (DPI tagging, validation)."""
+    async def _queue_screenshot(self, filepath: Path, png: bytes) -> None:
+        """Tag a captured PNG with the capture DPI and queue it for writing."""
+        loop = asyncio.get_running_loop()
         try:
-            # Open image with Pillow
-            with Image.open(filepath) as img:
-                # Set DPI for proper scaling
-                dpi = int(96 * settings.device_scale_factor)
-                img.info['dpi'] = (dpi, dpi)
-                
-                # Save with metadata
-                img.save(filepath, 'PNG', dpi=(dpi, dpi))
-                
-            # Verify file was created and has reasonable size
-            if filepath.exists():
-                file_size = filepath.stat().st_size
-                if file_size < 1024:  # Less than 1KB
-                    logger.warning("Screenshot file seems too small", 
-                                 filepath=str(filepath), 
-                                 size=file_size)
-                    
+            png = await loop.run_in_executor(None, self._tag_dpi, png)
         except Exception as e:
+            # Keep the untagged capture rather than losing it
             logger.error("Error post-processing image", filepath=str(filepath), error=str(e))
+        self._enqueue_write(filepath, png)
+    
+    def _tag_dpi(self, png: bytes) -> bytes:
+        """Re-encode PNG bytes with DPI metadata."""
+        Image = _load_pil_image()
+        
+        with Image.open(io.BytesIO(png)) as img:
+            return self._encode_png(img)
+    
+    def _encode_png(self, img) -> bytes:
+        """Encode an image as PNG tagged with the capture DPI."""
+        # Set DPI for proper scaling
+        dpi = int(96 * settings.device_scale_factor)
+        buffer = io.BytesIO()
+        img.save(buffer, 'PNG', dpi=(dpi, dpi), compress_level=settings.png_compress_level)
+        return buffer.getvalue()
     
     async def get_screenshot_metrics(self, page: Page) -> dict:
         """Get metrics about the page for screenshot planning."""
@@ -372,7 +492,7 @@ class ScreenshotShooter:
             metrics["viewport_height"] = viewport["height"]
             
             # Get full page height
-            page_height = await page.evaluate("document.body.scrollHeight")
+            page_height = await page.evaluate(_PAGE_HEIGHT_JS)
             metrics["page_height"] = page_height
             
             # Find content area
@@ -408,4 +528,7 @@ async def capture_sections(
 ) -> List[Tuple[str, int, str]]:
     """Convenience function to capture section screenshots."""
     shooter = ScreenshotShooter()
-    return await shooter.shoot_sections(page, slug, run_id, outdir) 
\ No newline at end of file
+    try:
+        return await shooter.shoot_sections(page, slug, run_id, outdir)
+    finally:
+        await shooter.close() 
\ No newline at end of file
@@ -2,17 +2,29 @@
 
 import asyncio
 import random
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Tuple
 
 from asyncio_throttle import Throttler
+from playwright.async_api import Error as PlaywrightError
 from playwright.async_api import Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from structlog import get_logger
-from tenacity import retry, stop_after_attempt, wait_exponential
+from structlog.contextvars import bound_contextvars
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
-from .auth import AuthManager
+from .auth import AuthManager, ContextPool, close_page
+from .backpressure import (
+    AIMD,
+    RateLimited,
+    RateLimitWindow,
+    TransientError,
+    parse_retry_after,
+    wait_retry_after,
+)
 from .config import settings
 from .db import DatabaseManager
 from .discover import discover_articles
@@ -22,23 +34,67 @@ from .validator import ContentValidator
 
 logger = get_logger(__name__)
 
+# Resolves once the article container has rendered some real text
+_ARTICLE_READY_JS = (
+    "() => !!document.querySelector('main, article, [data-e2e-test-id]')"
+    " && document.body.innerText.length > 500"
+)
+
+# Navigation failures that may succeed on a later attempt
+_TRANSIENT_ERRORS = (PlaywrightTimeoutError, TransientError)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Whether a navigation failure is worth retrying."""
+    if isinstance(exc, _TRANSIENT_ERRORS):
+        return True
+    # Network failures surface as a plain Playwright Error, e.g. net::ERR_CONNECTION_RESET
+    return isinstance(exc, PlaywrightError) and "net::ERR_" in str(exc)
+
+
+# Terminal statuses are flushed once this many outcomes, or this many seconds,
+# have accumulated, so a crash mid-batch loses little finished work
+_FINALIZE_FLUSH_SIZE = 10
+_FINALIZE_FLUSH_INTERVAL = 30.0
+
 
 class ScrapingTask:
     """Main task orchestrator for AMBOSS scraping."""
     
     def __init__(self):
         self.throttler = Throttler(rate_limit=settings.requests_per_minute, period=60)
+        self.semaphore = asyncio.Semaphore(settings.max_concurrency)
+        self.aimd = AIMD(
+            max_limit=settings.max_concurrency,
+            target_latency=settings.navigation_target_latency
+        )
+        self.rate_window = RateLimitWindow(default_limit=settings.requests_per_minute)
         self.auth_manager = None
         self.db = None
+        self.expander = ContentExpander()
+        self.validator = ContentValidator()
+        self.shooter = ScreenshotShooter()
+        self.context_pool: Optional[ContextPool] = None
     
     async def __aenter__(self):
         """Async context manager entry."""
         self.auth_manager = AuthManager()
         await self.auth_manager.__aenter__()
+        self.context_pool = ContextPool(
+            self.auth_manager,
+            size=settings.max_concurrency,
+            max_pages=settings.context_max_pages
+        )
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
+        # Screenshots are written in the background; finish them first
+        await self.shooter.close()
+        
+        if self.context_pool:
+            await self.context_pool.close()
+        
         if self.auth_manager:
             await self.auth_manager.__aexit__(exc_type, exc_val, exc_tb)
     
@@ -58,14 +114,24 @@ class ScrapingTask:
         run_id: str
     ) -> Tuple[bool, Optional[str]]:
         """Process a single article slug."""
-        logger.info("Processing slug", slug=slug, url=url, run_id=run_id)
+        logger.info("Processing slug", slug=slug, url=url)
         
-        # Rate limiting
-        async with self.throttler:
-            try:
-                # Create browser context
-                context = await self.auth_manager.create_context()
-                page = await context.new_page()
+        # Random jitter so concurrent workers don't hit the site in lockstep;
+        # taken before the semaphore so waiting doesn't occupy a slot
+        await asyncio.sleep(random.uniform(settings.min_delay, settings.max_delay))
+        
+        # One future per queued screenshot file of this slug
+        writes: List[asyncio.Future] = []
+        try:
+            # Bound the number of slugs in flight; navigation is further gated by AIMD
+            async with self.semaphore:
+                # Reuse a pooled browser context; only the page is per-slug
+                context = await self.context_pool.acquire()
+                try:
+                    page = await context.new_page()
+                except Exception:
+                    await self.context_pool.release(context)
+                    raise
                 
                 try:
                     # Navigate to page
@@ -86,22 +152,28 @@ class ScrapingTask:
                         )
                     
                     # Capture screenshots
-                    screenshots = await self._capture_screenshots(page, slug, run_id)
-                    
-                    # Save to database
-                    await self._save_results(slug, run_id, screenshots)
-                    
-                    logger.info("Successfully processed slug", slug=slug, run_id=run_id)
-                    return True, None
-                    
+                    screenshots = await self._capture_screenshots(page, slug, run_id, writes)
+                
                 finally:
-                    await page.close()
-                    await context.close()
-                    
-            except Exception as e:
-                error_msg = str(e)
-                logger.error("Failed to process slug", slug=slug, error=error_msg)
-                return False, error_msg
+                    try:
+                        await close_page(page)
+                    finally:
+                        await self.context_pool.release(context)
+            
+            # Files are written while the next slug navigates; only record
+            # them once this slug's own files are on disk
+            await self.shooter.wait_for_writes(writes)
+            
+            # Save to database
+            await self._save_results(slug, run_id, screenshots)
+            
+            logger.info("Successfully processed slug", slug=slug)
+            return True, None
+        
+        except Exception as e:
+            error_msg = str(e)
+            logger.error("Failed to process slug", slug=slug, error=error_msg)
+            return False, error_msg
     
     async def process_pending_urls(
         self, 
@@ -110,119 +182,185 @@ class ScrapingTask:
     ) -> dict:
         """Process all pending URLs in the database."""
         if run_id is None:
-            run_id = str(uuid.uuid4())
-        
-        logger.info("Starting batch processing", run_id=run_id, limit=limit)
-        
-        async with DatabaseManager() as db:
-            self.db = db
+            run_id = uuid.uuid4().hex
+        # Attach run_id to every log record from this batch, including its tasks
+        with bound_contextvars(run_id=run_id):
+            logger.info("Starting batch processing", limit=limit)
             
-            # Get pending URLs
-            pending_urls = await db.get_pending_urls(limit)
-            
-            if not pending_urls:
-                logger.info("No pending URLs to process")
-                return {"processed": 0, "successful": 0, "failed": 0}
-            
-            logger.info(f"Found {len(pending_urls)} pending URLs to process")
-            
-            # Process each URL
-            successful = 0
-            failed = 0
-            
-            for slug, url in pending_urls:
-                # Update status to processing
-                await db.update_url_status(slug, "processing")
+            async with DatabaseManager() as db:
+                self.db = db
                 
-                # Start run
-                await db.start_run(run_id, slug)
+                # Claim pending URLs and open their runs in one round-trip
+                pending_urls = await db.claim_pending_batch(run_id, limit)
                 
-                # Process the slug
-                success, error = await self.process_slug(slug, url, run_id)
+                if not pending_urls:
+                    logger.info("No pending URLs to process")
+                    return {"processed": 0, "successful": 0, "failed": 0}
                 
-                if success:
-                    await db.update_url_status(slug, "done")
-                    await db.finish_run(run_id, slug, True)
-                    successful += 1
-                else:
-                    await db.update_url_status(slug, "failed_expansion", error)
-                    await db.finish_run(run_id, slug, False, error)
-                    failed += 1
+                logger.info(f"Found {len(pending_urls)} pending URLs to process")
+                return await self._process_rows(db, pending_urls, run_id)
+    
+    async def _process_rows(
+        self, 
+        db: DatabaseManager, 
+        rows: List[Tuple[str, str]], 
+        run_id: str
+    ) -> dict:
+        """Process claimed (slug, url) rows and record their outcomes."""
+        async def run(slug: str, url: str) -> Tuple[str, bool, Optional[str]]:
+            try:
+                success, error = await self.process_slug(slug, url, run_id)
+            except Exception as e:
+                success, error = False, str(e)
+            return slug, success, error
+        
+        # Process URLs concurrently; process_slug bounds the fan-out
+        tasks = [asyncio.create_task(run(slug, url)) for slug, url in rows]
+        
+        results = []
+        pending = []
+        last_flush = time.monotonic()
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                pending.append(await next_done)
                 
-                # Random delay between requests
-                delay = random.uniform(settings.min_delay, settings.max_delay)
-                await asyncio.sleep(delay)
+                # Record terminal statuses as results complete, in small batches
+                if (len(pending) >= _FINALIZE_FLUSH_SIZE
+                        or time.monotonic() - last_flush >= _FINALIZE_FLUSH_INTERVAL):
+                    await db.finalize_batch(run_id, pending)
+                    results.extend(pending)
+                    pending = []
+                    last_flush = time.monotonic()
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let cancelled slugs unwind and close their pages before touching the db
+            await asyncio.gather(*tasks, return_exceptions=True)
             
-            logger.info("Batch processing completed", 
-                       run_id=run_id,
-                       total=len(pending_urls),
-                       successful=successful,
-                       failed=failed)
+            # Slugs that finished but were not yet collected still count as finished
+            collected = {slug for slug, _, _ in results + pending}
+            for task in tasks:
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                outcome = task.result()
+                if outcome[0] not in collected:
+                    pending.append(outcome)
             
-            return {
-                "processed": len(pending_urls),
-                "successful": successful,
-                "failed": failed,
-                "run_id": run_id
-            }
+            try:
+                # Keep whatever finished, even if the batch was cancelled
+                if pending:
+                    await db.finalize_batch(run_id, pending)
+                    results.extend(pending)
+            finally:
+                # Hand unfinished claims back so a later run picks them up
+                finalized = {slug for slug, _, _ in results}
+                unfinished = [slug for slug, _ in rows if slug not in finalized]
+                if unfinished:
+                    logger.warning("Releasing unfinished slugs", count=len(unfinished))
+                    await db.release_claims(run_id, unfinished)
+        
+        successful = sum(1 for _, ok, _ in results if ok)
+        failed = len(results) - successful
+        
+        logger.info("Batch processing completed", 
+                   total=len(rows),
+                   successful=successful,
+                   failed=failed)
+        
+        return {
+            "processed": len(rows),
+            "successful": successful,
+            "failed": failed,
+            "run_id": run_id
+        }
     
-    async def retry_failed_urls(self, run_id: Optional[str] = None) -> dict:
+    async def retry_failed_urls(
+        self, 
+        run_id: Optional[str] = None,
+        *,
+        limit: Optional[int] = None
+    ) -> dict:
         """Retry processing of failed URLs."""
         if run_id is None:
-            run_id = str(uuid.uuid4())
-        
-        logger.info("Starting retry of failed URLs", run_id=run_id)
-        
-        async with DatabaseManager() as db:
-            self.db = db
+            run_id = uuid.uuid4().hex
+        with bound_contextvars(run_id=run_id):
+            logger.info("Starting retry of failed URLs")
             
-            # Get failed URLs
-            failed_urls = await db.get_failed_urls()
-            
-            if not failed_urls:
-                logger.info("No failed URLs to retry")
-                return {"retried": 0, "successful": 0, "failed": 0}
-            
-            logger.info(f"Found {len(failed_urls)} failed URLs to retry")
-            
-            # Reset status to pending for retry
-            for slug, url, error in failed_urls:
-                await db.update_url_status(slug, "pending")
-            
-            # Process them as pending URLs
-            return await self.process_pending_urls(limit=len(failed_urls), run_id=run_id)
+            async with DatabaseManager() as db:
+                self.db = db
+                
+                # Requeue failed URLs and open their runs in one round-trip
+                failed_urls = await db.requeue_failed(run_id, limit)
+                
+                if not failed_urls:
+                    logger.info("No failed URLs to retry")
+                    return {"retried": 0, "successful": 0, "failed": 0}
+                
+                logger.info(f"Found {len(failed_urls)} failed URLs to retry")
+                return await self._process_rows(db, failed_urls, run_id)
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=2))
+    @retry(
+        retry=retry_if_exception(_is_transient),
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=2) + wait_retry_after()
+    )
     async def _navigate_to_page(self, page: Page, url: str) -> None:
         """Navigate to the target page with retry logic."""
         logger.debug("Navigating to page", url=url)
         
-        # Use domcontentloaded instead of networkidle to avoid timeouts
-        await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+        await self.rate_window.wait()
         
-        # Wait for content to load
-        await page.wait_for_load_state("domcontentloaded")
-        await asyncio.sleep(3)  # Additional wait for dynamic content
+        # Adaptive gate on top of the hard cap, then rate limiting; held
+        # only for the request itself so AIMD adapts to navigation latency
+        async with self.aimd, self.throttler:
+            # Use domcontentloaded instead of networkidle to avoid timeouts
+            t0 = time.monotonic()
+            try:
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+            except Exception as e:
+                if _is_transient(e):
+                    self.aimd.on_error()
+                raise
+        
+        if response is not None:
+            self.rate_window.observe(response.headers)
+        
+        if response is not None and response.status == 429:
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            self.aimd.on_error(rate_limited=True, retry_after=retry_after)
+            raise RateLimited(f"Rate limited by AMBOSS: {url}", retry_after)
+        
+        if response is not None and 500 <= response.status < 600:
+            self.aimd.on_error()
+            raise TransientError(f"Server error {response.status}: {url}")
+        
+        self.aimd.on_success(time.monotonic() - t0)
+        
+        # goto already waited for domcontentloaded; wait for the article itself
+        try:
+            await page.wait_for_function(_ARTICLE_READY_JS, timeout=3000)
+        except PlaywrightTimeoutError:
+            logger.debug("Article container not ready, continuing", url=url)
     
     async def _expand_content(self, page: Page) -> None:
         """Expand all collapsed content on the page."""
-        expander = ContentExpander()
-        await expander.fully_expand(page)
+        await self.expander.fully_expand(page)
     
     async def _validate_page(self, page: Page) -> dict:
         """Validate the page content."""
-        validator = ContentValidator()
-        return await validator.validate_page(page)
+        return await self.validator.validate_page(page)
     
     async def _capture_screenshots(
         self, 
         page: Page, 
         slug: str, 
-        run_id: str
+        run_id: str,
+        writes: Optional[List[asyncio.Future]] = None
     ) -> List[Tuple[str, int, str]]:
         """Capture screenshots of the page."""
-        shooter = ScreenshotShooter()
-        return await shooter.shoot_sections(page, slug, run_id, settings.output_dir)
+        return await self.shooter.shoot_sections(
+            page, slug, run_id, settings.output_dir, writes=writes
+        )
     
     async def _save_results(
         self, 
@@ -234,8 +372,7 @@ class ScrapingTask:
         if not self.db:
             return
         
-        for filename, idx, section_title in screenshots:
-            await self.db.add_image(run_id, slug, filename, idx, section_title)
+        await self.db.add_images_bulk(run_id, slug, screenshots)
     
     async def get_stats(self) -> dict:
         """Get processing statistics."""
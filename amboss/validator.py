@@ -2,10 +2,12 @@
 
 import asyncio
 import io
+import struct
 from pathlib import Path
 from typing import List, Optional, Tuple
 
-from PIL import Image, ImageStat
+import numpy as np
+from PIL import Image
 from playwright.async_api import Page
 from structlog import get_logger
 
@@ -13,18 +15,172 @@ from .config import settings
 
 logger = get_logger(__name__)
 
+# Selectors for expand prompts that should be gone after full expansion,
+# pre-classified as CSS selectors or exact element texts
+HIDDEN_SELECTORS = (
+    ("css", "[data-e2e-test-id='section-content-is-hidden']"),
+    ("text", "Weiterlesen"),
+    ("text", "Read more"),
+    ("text", "Mehr anzeigen"),
+    ("text", "Show more"),
+)
+
+# Counts visible elements matching (kind, value) selector pairs. Text
+# selectors match the parent element of a text node when the parent's trimmed
+# text equals the value; all text selectors share one TreeWalker pass.
+_COUNT_VISIBLE_JS = """
+(selectors) => {
+    const isVisible = (el) => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0
+            && getComputedStyle(el).visibility !== 'hidden';
+    };
+    let total = 0;
+    const texts = new Set();
+    for (const [kind, value] of selectors) {
+        if (kind === 'text') {
+            texts.add(value);
+        } else {
+            for (const el of document.querySelectorAll(value)) if (isVisible(el)) total++;
+        }
+    }
+    if (!texts.size) return total;
+    
+    // A text node longer than every target cannot belong to a matching parent
+    const maxLength = Math.max(...[...texts].map(text => text.length));
+    const seen = new Set();
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        const parent = node.parentElement;
+        if (!parent || seen.has(parent) || node.data.trim().length > maxLength) continue;
+        seen.add(parent);
+        if (texts.has(parent.textContent.trim()) && isVisible(parent)) total++;
+    }
+    return total;
+}
+"""
+
+
+# Row/column stride used when sampling pixels for the density estimate
+_DENSITY_SAMPLE_STEP = 4
+
+
+def _grayscale_stddev(img: Image.Image, precise: bool = False) -> float:
+    """Standard deviation of the grayscale pixel values of an image.
+    
+    Unless ``precise`` is set, only every 4th row and column is used, which
+    is plenty for a coarse density threshold. The image is still decoded in
+    full, but it is subsampled before the grayscale conversion, so only a
+    1/16 size grayscale copy and array are built.
+    """
+    if not precise:
+        step = _DENSITY_SAMPLE_STEP
+        width, height = img.size
+        img = img.resize((-(-width // step), -(-height // step)), Image.NEAREST)
+    arr = np.asarray(img.convert('L'), dtype=np.uint8)
+    return float(arr.std())
+
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def _png_dimensions(path: Path) -> Optional[Tuple[int, int]]:
+    """Read width and height from a PNG's IHDR chunk without decoding it.
+    
+    Returns None if the file is not a PNG.
+    """
+    with open(path, "rb") as f:
+        head = f.read(24)
+    if len(head) < 24 or head[:8] != _PNG_SIGNATURE:
+        return None
+    return struct.unpack(">II", head[16:24])
+
 
 class ValidationFailure(Exception):
     """Raised when validation fails."""
     pass
 
 
+def _validate_path_sync(
+    screenshot_path: Path, 
+    min_ocr_density: float, 
+    precise: bool = False
+) -> dict:
+    """Validate a single screenshot file.
+    
+    Synchronous so it can run in a worker thread.
+    """
+    result = {
+        "file": str(screenshot_path),
+        "valid": True,
+        "file_size": 0,
+        "dimensions": None,
+        "density_score": 0.0,
+        "error": None
+    }
+    
+    try:
+        # Check file exists and has reasonable size
+        if not screenshot_path.exists():
+            raise ValidationFailure("Screenshot file does not exist")
+        
+        file_size = screenshot_path.stat().st_size
+        result["file_size"] = file_size
+        
+        if file_size < 1024:  # Less than 1KB
+            raise ValidationFailure(f"Screenshot file too small: {file_size} bytes")
+        
+        # Check dimensions from the PNG header before decoding anything
+        dimensions = _png_dimensions(screenshot_path)
+        if dimensions is not None:
+            result["dimensions"] = dimensions
+            if dimensions[0] < 100 or dimensions[1] < 100:
+                raise ValidationFailure(f"Screenshot dimensions too small: {dimensions}")
+        
+        # Open and analyze image
+        with Image.open(screenshot_path) as img:
+            if dimensions is None:
+                result["dimensions"] = img.size
+                
+                # Check dimensions
+                if img.size[0] < 100 or img.size[1] < 100:
+                    raise ValidationFailure(f"Screenshot dimensions too small: {img.size}")
+            
+            # Calculate content density
+            stddev = _grayscale_stddev(img, precise)
+            
+            # Normalize density score
+            density_score = min(1.0, stddev / 100.0)
+            result["density_score"] = density_score
+            
+            if density_score < min_ocr_density:
+                raise ValidationFailure(
+                    f"Content density too low: {density_score:.2f} < {min_ocr_density}"
+                )
+        
+        logger.debug(f"Screenshot validation passed", 
+                   file=str(screenshot_path),
+                   size=file_size,
+                   dimensions=result["dimensions"],
+                   density=density_score)
+        
+    except Exception as e:
+        result["valid"] = False
+        result["error"] = str(e)
+        logger.warning(f"Screenshot validation failed", 
+                     file=str(screenshot_path),
+                     error=str(e))
+    
+    return result
+
+
 class ContentValidator:
     """Validates screenshot quality and content completeness."""
     
     def __init__(self):
         self.min_ocr_density = settings.min_ocr_density
         self.ocr_stddev_threshold = settings.ocr_stddev_threshold
+        self.precise_density = settings.precise_density
     
     async def validate_page(self, page: Page) -> dict:
         """Validate the entire page for completeness and quality."""
@@ -69,73 +225,53 @@ class ContentValidator:
         screenshot_paths: List[Path]
     ) -> List[dict]:
         """Validate individual screenshot files."""
-        validation_results = []
+        # Decoding and analysing PNGs is CPU-bound; Pillow and numpy release
+        # the GIL for most of it, so the default thread pool keeps it off the loop
+        results = await asyncio.gather(
+            *(self._validate_single_screenshot(path) for path in screenshot_paths),
+            return_exceptions=True
+        )
         
-        for screenshot_path in screenshot_paths:
-            try:
-                result = await self._validate_single_screenshot(screenshot_path)
-                validation_results.append(result)
-                
-            except Exception as e:
-                logger.error(f"Error validating screenshot {screenshot_path}", error=str(e))
+        validation_results = []
+        for screenshot_path, result in zip(screenshot_paths, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error validating screenshot {screenshot_path}", error=str(result))
                 validation_results.append({
                     "file": str(screenshot_path),
                     "valid": False,
-                    "error": str(e)
+                    "error": str(result)
                 })
+            else:
+                validation_results.append(result)
         
         return validation_results
     
     async def _check_hidden_sections(self, page: Page) -> int:
         """Check for any remaining hidden sections."""
-        hidden_selectors = [
-            "[data-e2e-test-id='section-content-is-hidden']",
-            "text='Weiterlesen'",
-            "text='Read more'",
-            "text='Mehr anzeigen'",
-            "text='Show more'"
-        ]
-        
-        total_hidden = 0
-        
-        for selector in hidden_selectors:
-            try:
-                elements = page.locator(selector)
-                count = await elements.count()
-                
-                if count > 0:
-                    # Check if any are actually visible
-                    visible_count = 0
-                    for i in range(count):
-                        element = elements.nth(i)
-                        if await element.is_visible():
-                            visible_count += 1
-                    
-                    total_hidden += visible_count
-                    
-            except Exception as e:
-                logger.warning(f"Error checking hidden sections with selector {selector}", error=str(e))
-                continue
-        
-        return total_hidden
+        try:
+            # Count visible matches for all selectors in a single round-trip
+            return await page.evaluate(_COUNT_VISIBLE_JS, HIDDEN_SELECTORS)
+        except Exception as e:
+            logger.warning("Error checking hidden sections", error=str(e))
+            return 0
     
     async def _check_content_density(self, page: Page) -> float:
         """Check content density using a simple heuristic."""
         try:
-            # Take a screenshot for analysis
-            screenshot_bytes = await page.screenshot(type="png")
+            # A low-quality viewport JPEG at CSS scale is plenty for a stddev
+            # heuristic and avoids a full-resolution PNG encode + transfer
+            screenshot_bytes = await page.screenshot(
+                type="jpeg", 
+                quality=40, 
+                scale="css", 
+                full_page=False
+            )
             
             # Analyze image using Pillow
             with Image.open(io.BytesIO(screenshot_bytes)) as img:
-                # Convert to grayscale for analysis
-                gray_img = img.convert('L')
-                
-                # Calculate statistics
-                stat = ImageStat.Stat(gray_img)
-                
-                # Use standard deviation as a proxy for content density
+                # Use grayscale standard deviation as a proxy for content density
                 # Higher stddev = more variation = more content
-                stddev = stat.stddev[0]
+                stddev = _grayscale_stddev(img, self.precise_density)
                 
                 # Normalize to a 0-1 scale (empirical threshold)
                 density_score = min(1.0, stddev / 100.0)
@@ -152,64 +288,11 @@ class ContentValidator:
     
     async def _validate_single_screenshot(self, screenshot_path: Path) -> dict:
         """Validate a single screenshot file."""
-        result = {
-            "file": str(screenshot_path),
-            "valid": True,
-            "file_size": 0,
-            "dimensions": None,
-            "density_score": 0.0,
-            "error": None
-        }
-        
-        try:
-            # Check file exists and has reasonable size
-            if not screenshot_path.exists():
-                raise ValidationFailure("Screenshot file does not exist")
-            
-            file_size = screenshot_path.stat().st_size
-            result["file_size"] = file_size
-            
-            if file_size < 1024:  # Less than 1KB
-                raise ValidationFailure(f"Screenshot file too small: {file_size} bytes")
-            
-            # Open and analyze image
-            with Image.open(screenshot_path) as img:
-                result["dimensions"] = img.size
-                
-                # Check dimensions
-                if img.size[0] < 100 or img.size[1] < 100:
-                    raise ValidationFailure(f"Screenshot dimensions too small: {img.size}")
-                
-                # Calculate content density
-                gray_img = img.convert('L')
-                stat = ImageStat.Stat(gray_img)
-                stddev = stat.stddev[0]
-                
-                # Normalize density score
-                density_score = min(1.0, stddev / 100.0)
-                result["density_score"] = density_score
-                
-                if density_score < self.min_ocr_density:
-                    raise ValidationFailure(
-                        f"Content density too low: {density_score:.2f} < {self.min_ocr_density}"
-                    )
-            
-            logger.debug(f"Screenshot validation passed", 
-                       file=str(screenshot_path),
-                       size=file_size,
-                       dimensions=result["dimensions"],
-                       density=density_score)
-            
-        except Exception as e:
-            result["valid"] = False
-            result["error"] = str(e)
-            logger.warning(f"Screenshot validation failed", 
-                         file=str(screenshot_path),
-                         error=str(e))
-        
-        return result
+        return await asyncio.to_thread(
+            _validate_path_sync, screenshot_path, self.min_ocr_density, self.precise_density
+        )
     
-    async def get_validation_summary(self, validation_results: List[dict]) -> dict:
+    def get_validation_summary(self, validation_results: List[dict]) -> dict:
         """Get a summary of validation results."""
         total_files = len(validation_results)
         valid_files = sum(1 for r in validation_results if r.get("valid", False))
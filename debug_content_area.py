@@ -4,7 +4,41 @@ Debug script to find the actual content area using Playwright's bounding_box().
 
 import asyncio
 from amboss.auth import AuthManager
-from amboss.expander import ContentExpander
+from amboss.expander import ContentExpander, wait_for_article
+
+# Describes up to 3 matches per selector in a single evaluate call
+_DESCRIBE_SELECTORS_JS = """
+(selectors) => selectors.map(selector => {
+    let matches;
+    try {
+        matches = [...document.querySelectorAll(selector)];
+    } catch (e) {
+        return {selector, count: 0, elements: [], error: String(e)};
+    }
+    const elements = matches.slice(0, 3).map(el => {
+        const r = el.getBoundingClientRect();
+        return {
+            visible: r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== 'hidden',
+            x: r.x, y: r.y, w: r.width, h: r.height,
+            sh: el.scrollHeight,
+            preview: (el.textContent || '').slice(0, 200)
+        };
+    });
+    return {selector, count: matches.length, elements};
+})
+"""
+
+# Large visible text containers among the first 10 block elements
+_LARGE_TEXT_ELEMENTS_JS = """
+() => [...document.querySelectorAll('div, section, article, main')].slice(0, 10)
+    .map((el, index) => {
+        const r = el.getBoundingClientRect();
+        const text = el.textContent || '';
+        return {index, x: r.x, y: r.y, w: r.width, h: r.height,
+                textLen: text.length, preview: text.slice(0, 150)};
+    })
+    .filter(el => el.w > 200 && el.h > 300 && el.textLen > 100)
+"""
 
 async def debug_content_area():
     """Find the actual content area of the article page."""
@@ -18,7 +52,9 @@ async def debug_content_area():
         try:
             print(f"🔍 Navigating to: {test_url}")
             await page.goto(test_url, wait_until="domcontentloaded", timeout=15000)
-            await asyncio.sleep(3)
+            # Continue as soon as the article skeleton has rendered
+            if not await wait_for_article(page):
+                print("⚠️  Article content did not render within 5s")
             
             # Handle popups first
             expander = ContentExpander()
@@ -56,72 +92,52 @@ async def debug_content_area():
                 ".content-section"
             ]
             
+            # One round-trip: count, visibility, box, scroll height and preview per selector
+            results = await page.evaluate(_DESCRIBE_SELECTORS_JS, content_selectors)
+            
             found_content = False
             
-            for selector in content_selectors:
-                try:
-                    element = page.locator(selector)
-                    count = await element.count()
-                    
-                    if count > 0:
-                        print(f"\n✅ Found {count} element(s) with selector: '{selector}'")
-                        
-                        for i in range(min(count, 3)):  # Check first 3 elements
-                            element_instance = element.nth(i)
-                            
-                            if await element_instance.is_visible():
-                                bbox = await element_instance.bounding_box()
-                                if bbox:
-                                    print(f"  Element {i}:")
-                                    print(f"    x: {bbox['x']}")
-                                    print(f"    y: {bbox['y']}")
-                                    print(f"    width: {bbox['width']}")
-                                    print(f"    height: {bbox['height']}")
-                                    print(f"    Area: {bbox['width']} x {bbox['height']} = {bbox['width'] * bbox['height']}px²")
-                                    
-                                    # Get the full scroll height of the element
-                                    full_height = await element_instance.evaluate("el => el.scrollHeight")
-                                    print(f"    Full scroll height: {full_height}px")
-                                    
-                                    # Get some text content to verify it's the right area
-                                    text_content = await element_instance.text_content()
-                                    if text_content:
-                                        preview = text_content[:200].replace('\n', ' ').strip()
-                                        print(f"    Preview: {preview}...")
-                                    
-                                    found_content = True
-                                else:
-                                    print(f"  Element {i}: No bounding box")
-                            else:
-                                print(f"  Element {i}: Not visible")
-                    else:
-                        print(f"❌ No elements found with selector: '{selector}'")
-                        
-                except Exception as e:
-                    print(f"❌ Error with selector '{selector}': {e}")
+            for result in results:
+                selector = result['selector']
+                if result.get('error'):
+                    print(f"❌ Error with selector '{selector}': {result['error']}")
+                    continue
+                if result['count'] == 0:
+                    print(f"❌ No elements found with selector: '{selector}'")
+                    continue
+                
+                print(f"\n✅ Found {result['count']} element(s) with selector: '{selector}'")
+                
+                for i, el in enumerate(result['elements']):  # First 3 elements
+                    if not el['visible']:
+                        print(f"  Element {i}: Not visible")
+                        continue
+                    print(f"  Element {i}:")
+                    print(f"    x: {el['x']}")
+                    print(f"    y: {el['y']}")
+                    print(f"    width: {el['w']}")
+                    print(f"    height: {el['h']}")
+                    print(f"    Area: {el['w']} x {el['h']} = {el['w'] * el['h']}px²")
+                    print(f"    Full scroll height: {el['sh']}px")
+                    if el['preview']:
+                        preview = el['preview'].replace('\n', ' ').strip()
+                        print(f"    Preview: {preview}...")
+                    found_content = True
             
             if not found_content:
                 print("\n⚠️ No content areas found with standard selectors.")
                 print("Let's try to find any large text containers:")
                 
-                # Try to find any large text containers
-                large_elements = await page.query_selector_all("div, section, article, main")
+                # Try to find any large text containers among the first 10
+                large_elements = await page.evaluate(_LARGE_TEXT_ELEMENTS_JS)
                 
-                for i, element in enumerate(large_elements[:10]):  # Check first 10
-                    try:
-                        if await element.is_visible():
-                            bbox = await element.bounding_box()
-                            if bbox and bbox['width'] > 200 and bbox['height'] > 300:
-                                text_content = await element.text_content()
-                                if text_content and len(text_content) > 100:
-                                    print(f"\n📄 Large text element {i}:")
-                                    print(f"  x: {bbox['x']}, y: {bbox['y']}")
-                                    print(f"  width: {bbox['width']}, height: {bbox['height']}")
-                                    print(f"  text length: {len(text_content)}")
-                                    preview = text_content[:150].replace('\n', ' ').strip()
-                                    print(f"  preview: {preview}...")
-                    except:
-                        continue
+                for el in large_elements:
+                    print(f"\n📄 Large text element {el['index']}:")
+                    print(f"  x: {el['x']}, y: {el['y']}")
+                    print(f"  width: {el['w']}, height: {el['h']}")
+                    print(f"  text length: {el['textLen']}")
+                    preview = el['preview'].replace('\n', ' ').strip()
+                    print(f"  preview: {preview}...")
             
             print("\n🎯 Recommended screenshot approach:")
             print("1. Find the main content area using bounding_box()")
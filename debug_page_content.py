@@ -3,7 +3,32 @@ Debug script to see what content is actually on the page.
 """
 
 import asyncio
-from amboss.auth import AuthManager
+from amboss.auth import close_shared_auth, get_shared_context
+from amboss.expander import wait_for_article
+
+MEDICAL_TERMS = ["Pränataldiagnostik", "Diagnostik", "Therapie", "Epidemiologie", "Ätiologie"]
+UI_TERMS = ["Willkommen", "Rabatt", "Fortbildung", "Schlüsselfunktionen", "Cookie", "Datenschutz"]
+LOGIN_TITLE_MARKERS = ("Anmelden", "Sign in")
+
+# Page title, text of the first h1 (or null) and the first 5 h1-h3 texts
+_PAGE_SUMMARY_JS = """
+() => {
+    const h1 = document.querySelector('h1');
+    return {
+        title: document.title,
+        h1: h1 ? h1.textContent : null,
+        headings: [...document.querySelectorAll('h1, h2, h3')].slice(0, 5).map(h => h.textContent)
+    };
+}
+"""
+
+# Returns the subset of terms present in the page body
+_FIND_TERMS_JS = """
+(terms) => {
+    const text = document.body.textContent || '';
+    return terms.filter(term => text.includes(term));
+}
+"""
 
 async def debug_page_content():
     """Debug what content is actually on the page."""
@@ -11,62 +36,69 @@ async def debug_page_content():
     test_url = "https://next.amboss.com/de/article/--0D-i"
     print(f"Navigating to: {test_url}")
     
-    async with AuthManager() as auth_manager:
-        context = await auth_manager.create_context()
-        page = await context.new_page()
+    context = await get_shared_context()
+    page = await context.new_page()
+    
+    try:
+        # Navigate to the page
+        print("1. Navigating to page...")
+        await page.goto(test_url, wait_until="domcontentloaded", timeout=15000)
+        # Continue as soon as the article skeleton has rendered
+        if not await wait_for_article(page):
+            print("⚠️  Article content did not render within 5s")
+        
+        # Get the title, main heading and first headings in one round-trip
+        summary = await page.evaluate(_PAGE_SUMMARY_JS)
+        print(f"2. Page title: {summary['title']}")
+        
+        if summary['h1'] is not None:
+            print(f"3. Main H1: {summary['h1']}")
+        else:
+            print("3. No H1 found")
         
-        try:
-            # Navigate to the page
-            print("1. Navigating to page...")
-            await page.goto(test_url, wait_until="domcontentloaded", timeout=15000)
-            await asyncio.sleep(3)
-            
-            # Get the page title
-            title = await page.title()
-            print(f"2. Page title: {title}")
-            
-            # Get the main heading
-            try:
-                h1 = await page.locator('h1').first.text_content()
-                print(f"3. Main H1: {h1}")
-            except:
-                print("3. No H1 found")
-            
-            # Get all headings
-            headings = await page.locator('h1, h2, h3').all_text_contents()
-            print(f"4. All headings: {headings[:5]}")  # First 5 headings
-            
-            # Get page URL
-            current_url = page.url
-            print(f"5. Current URL: {current_url}")
-            
-            # Check for medical content indicators
-            body_text = await page.locator('body').text_content()
-            medical_terms = ["Pränataldiagnostik", "Diagnostik", "Therapie", "Epidemiologie", "Ätiologie"]
-            
-            print("6. Medical content check:")
-            for term in medical_terms:
-                if term in body_text:
-                    print(f"   ✅ Found: {term}")
-                else:
-                    print(f"   ❌ Missing: {term}")
-            
-            # Check for UI elements we don't want
-            ui_terms = ["Willkommen", "Rabatt", "Fortbildung", "Schlüsselfunktionen", "Cookie", "Datenschutz"]
-            print("7. UI content check:")
-            for term in ui_terms:
-                if term in body_text:
-                    print(f"   ⚠️ Found UI: {term}")
-            
-            # Take a screenshot for inspection
-            await page.screenshot(path="debug_page_content.png", full_page=True)
-            print("8. Screenshot saved as debug_page_content.png")
-            
-        except Exception as e:
-            print(f"Error: {e}")
-        finally:
-            await page.close()
-            await context.close()
+        print(f"4. All headings: {summary['headings']}")  # First 5 headings
+        
+        # Get page URL
+        current_url = page.url
+        print(f"5. Current URL: {current_url}")
+        
+        # A login redirect has no article content, so the term scans would only mislead
+        if "/login" in current_url or any(m in summary['title'] for m in LOGIN_TITLE_MARKERS):
+            print("⚠️  Redirected to login page - authentication has likely expired")
+            return
+        
+        # Search for all terms in the browser instead of transferring the body text
+        found = set(await page.evaluate(_FIND_TERMS_JS, MEDICAL_TERMS + UI_TERMS))
+        
+        # Check for medical content indicators
+        print("6. Medical content check:")
+        for term in MEDICAL_TERMS:
+            if term in found:
+                print(f"   ✅ Found: {term}")
+            else:
+                print(f"   ❌ Missing: {term}")
+        
+        # Check for UI elements we don't want
+        print("7. UI content check:")
+        for term in UI_TERMS:
+            if term in found:
+                print(f"   ⚠️ Found UI: {term}")
+        
+        # Take a screenshot for inspection
+        await page.screenshot(path="debug_page_content.png", full_page=True)
+        print("8. Screenshot saved as debug_page_content.png")
+        
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        await page.close()
+
+async def main():
+    """Main function."""
+    try:
+        await debug_page_content()
+    finally:
+        await close_shared_auth()
 
 if __name__ == "__main__":
-    asyncio.run(debug_page_content()) 
\ No newline at end of file
+    asyncio.run(main()) 
\ No newline at end of file
@@ -7,12 +7,160 @@ import asyncio
 import sys
 from pathlib import Path
 
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
 # Add the amboss package to the path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from amboss.auth import AuthManager
+from amboss.auth import close_shared_auth, get_shared_context
 from amboss.config import settings
 
+# Popup buttons as (kind, value): "css" selectors or "button" texts, matched
+# like Playwright's button:has-text() (case-insensitive substring)
+_POPUP_SELECTORS = (
+    # Cookie consent
+    ("css", '[data-testid="cookie-banner"] button'),
+    ("css", '.cookie-banner button'),
+    ("button", "Accept"),  # also matches "Accept All"
+    ("button", "Akzeptieren"),  # also matches "Alle akzeptieren"
+    
+    # Welcome/onboarding popups
+    ("css", '[data-testid="welcome-modal"] button'),
+    ("css", '.welcome-modal button'),
+    ("button", "Schließen"),
+    ("button", "Close"),
+    ("button", "Verstanden"),
+    ("button", "Got it"),
+    
+    # Feature announcements
+    ("css", '[data-testid="announcement"] button'),
+    ("css", '.announcement button'),
+    ("button", "×"),
+    ("button", "✕"),
+    
+    # Generic close buttons
+    ("css", '[aria-label="Close"]'),
+    ("css", '[aria-label="Schließen"]'),
+    ("css", '.close-button'),
+    ("css", '.modal-close'),
+)
+
+_MODAL_SELECTORS = (
+    '[role="dialog"]',
+    '.modal',
+    '.overlay',
+    '[data-testid="modal"]'
+)
+
+_MODAL_CLOSE_TEXTS = ("×", "✕", "Close", "Schließen")
+
+_ARTICLE_CONTENT_SELECTORS = (
+    '[data-testid="article-body"]',
+    '[data-testid="article-content"]',
+    '.article-body',
+    '.article-content',
+    'article',
+    'main'
+)
+
+# First 200 characters of an element's text on a single line
+_TEXT_PREVIEW_JS = "el => (el.textContent || '').slice(0, 200).replace(/\\n/g, ' ').trim()"
+
+# Screenshots started by debug_screenshot() that have not been awaited yet
+_screenshot_tasks = []
+
+# Article link candidates as (kind, value): "css" selectors, or a tag name
+# plus the text it must contain like Playwright's tag:has-text()
+_ARTICLE_LINK_SELECTORS = (
+    ("css", 'a[href*="/article/"]'),
+    ("a", "Artikel"),
+    ("a", "Article"),
+    ("a", "Lesen"),
+    ("a", "Read"),
+    ("button", "Artikel öffnen"),
+    ("button", "Open article"),
+)
+
+# Describes every match as {selector, index, href, text, visible}; selector is
+# given in Playwright syntax so the chosen match can be clicked via a locator
+_DESCRIBE_LINKS_JS = """
+(selectors) => selectors.flatMap(([kind, value]) => {
+    const matches = kind === 'css'
+        ? [...document.querySelectorAll(value)]
+        : [...document.querySelectorAll(kind)].filter(el =>
+            el.textContent.toLowerCase().includes(value.toLowerCase()));
+    const selector = kind === 'css' ? value : `${kind}:has-text("${value}")`;
+    return matches.map((el, index) => {
+        const rect = el.getBoundingClientRect();
+        return {
+            selector, index,
+            href: el.getAttribute('href'),
+            text: el.textContent,
+            visible: rect.width > 0 && rect.height > 0
+        };
+    });
+})
+"""
+
+# Finds the first visible match as [element, description], or null
+_FIND_POPUP_JS = """
+(selectors) => {
+    const isVisible = (el) => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    };
+    const buttons = [...document.querySelectorAll('button')];
+    for (const [kind, value] of selectors) {
+        const el = kind === 'button'
+            ? buttons.find(b => isVisible(b)
+                && b.textContent.toLowerCase().includes(value.toLowerCase()))
+            : [...document.querySelectorAll(value)].find(isVisible);
+        if (el) {
+            return [el, kind === 'button' ? `button:has-text("${value}")` : value];
+        }
+    }
+    return null;
+}
+"""
+
+# Truthy as soon as any popup selector has a visible match
+_POPUP_PRESENT_JS = f"(selectors) => ({_FIND_POPUP_JS})(selectors) !== null"
+
+# Clicks the first visible match and returns its description, or null
+_CLICK_FIRST_POPUP_JS = f"""
+(selectors) => {{
+    const hit = ({_FIND_POPUP_JS})(selectors);
+    if (!hit) return null;
+    hit[0].click();
+    return hit[1];
+}}
+"""
+
+# Truthy as soon as any of the given CSS selectors matches
+_ANY_SELECTOR_PRESENT_JS = "(selectors) => selectors.some(s => document.querySelector(s))"
+
+# Clicks a close button inside each visible modal and reports what it found
+_CLOSE_MODALS_JS = """
+({selectors, closeTexts}) => selectors.map(selector => {
+    const isVisible = (el) => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    };
+    const modals = [...document.querySelectorAll(selector)];
+    const closed = [];
+    modals.forEach((modal, i) => {
+        if (!isVisible(modal)) return;
+        const button = [...modal.querySelectorAll('button')].find(b =>
+            closeTexts.some(t => b.textContent.toLowerCase().includes(t.toLowerCase())));
+        if (button) {
+            button.click();
+            closed.push(i);
+        }
+    });
+    return {selector, count: modals.length, closed};
+}).filter(modal => modal.count > 0)
+"""
+
 async def debug_popups():
     """Debug popups and navigation issues."""
     print("🔍 Debugging AMBOSS popups and navigation...")
@@ -20,137 +168,93 @@ async def debug_popups():
     # Test URL - this should be a medical article
     test_url = "https://next.amboss.com/de/article/-40DNT"  # Molluscum contagiosum
     
-    async with AuthManager() as auth_manager:
-        context = await auth_manager.create_context()
-        page = await context.new_page()
+    context = await get_shared_context()
+    page = await context.new_page()
+    
+    try:
+        print(f"📄 Navigating to: {test_url}")
+        await page.goto(test_url, wait_until="domcontentloaded", timeout=30000)
         
-        try:
-            print(f"📄 Navigating to: {test_url}")
-            await page.goto(test_url, wait_until="domcontentloaded", timeout=30000)
-            
-            print(f"📍 Current URL: {page.url}")
-            
-            # Take initial screenshot
-            await page.screenshot(path="debug_initial.png")
-            print("📸 Initial screenshot saved as debug_initial.png")
-            
-            # Check for popups and close them
-            await handle_popups(page)
-            
-            # Check if we're on the right page
-            title = await page.locator('h1').first.text_content()
-            print(f"📝 Page title: {title}")
-            
-            # Look for article content
-            await find_article_content(page)
-            
-            # Try to navigate to actual article
-            await navigate_to_article(page)
-            
-            # Take final screenshot
-            await page.screenshot(path="debug_final.png")
-            print("📸 Final screenshot saved as debug_final.png")
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return False
-        finally:
-            await page.close()
-            await context.close()
+        print(f"📍 Current URL: {page.url}")
+        
+        # Take initial screenshot
+        debug_screenshot(page, "debug_initial.png")
+        
+        # Check for popups and close them
+        await handle_popups(page)
+        
+        # Check if we're on the right page
+        title = await page.locator('h1').first.text_content()
+        print(f"📝 Page title: {title}")
+        
+        # Look for article content
+        await find_article_content(page)
+        
+        # Try to navigate to actual article
+        await navigate_to_article(page)
+        
+        # Take final screenshot
+        debug_screenshot(page, "debug_final.png")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+    finally:
+        # Let pending debug screenshots finish before the page goes away
+        await asyncio.gather(*_screenshot_tasks, return_exceptions=True)
+        _screenshot_tasks.clear()
+        await page.close()
+
+def debug_screenshot(page, path: str):
+    """Save a screenshot in the background when AMBOSS_DEBUG_SCREENS is set."""
+    if not settings.debug_screens:
+        return
+    _screenshot_tasks.append(asyncio.create_task(page.screenshot(path=path)))
+    print(f"📸 Saving screenshot as {path}")
 
 async def handle_popups(page):
     """Handle various types of popups."""
     print("🔧 Handling popups...")
     
-    # Common popup selectors
-    popup_selectors = [
-        # Cookie consent
-        '[data-testid="cookie-banner"] button',
-        '.cookie-banner button',
-        'button:has-text("Accept")',
-        'button:has-text("Akzeptieren")',
-        'button:has-text("Accept All")',
-        'button:has-text("Alle akzeptieren")',
-        
-        # Welcome/onboarding popups
-        '[data-testid="welcome-modal"] button',
-        '.welcome-modal button',
-        'button:has-text("Schließen")',
-        'button:has-text("Close")',
-        'button:has-text("Verstanden")',
-        'button:has-text("Got it")',
-        
-        # Feature announcements
-        '[data-testid="announcement"] button',
-        '.announcement button',
-        'button:has-text("×")',
-        'button:has-text("✕")',
-        
-        # Generic close buttons
-        '[aria-label="Close"]',
-        '[aria-label="Schließen"]',
-        '.close-button',
-        '.modal-close'
-    ]
-    
-    for selector in popup_selectors:
-        try:
-            element = await page.wait_for_selector(selector, timeout=2000)
-            if element and await element.is_visible():
-                await element.click()
-                print(f"✅ Clicked popup: {selector}")
-                await page.wait_for_timeout(1000)
-                break
-        except:
-            continue
-    
-    # Check for modals/overlays
-    modal_selectors = [
-        '[role="dialog"]',
-        '.modal',
-        '.overlay',
-        '[data-testid="modal"]'
-    ]
+    # Give popups one shared 2s budget to appear, then click the first match
+    try:
+        await page.wait_for_function(_POPUP_PRESENT_JS, arg=_POPUP_SELECTORS, timeout=2000)
+        clicked = await page.evaluate(_CLICK_FIRST_POPUP_JS, _POPUP_SELECTORS)
+        if clicked:
+            print(f"✅ Clicked popup: {clicked}")
+            await page.wait_for_timeout(1000)
+    except PlaywrightTimeoutError:
+        pass
     
-    for selector in modal_selectors:
-        try:
-            elements = page.locator(selector)
-            count = await elements.count()
-            if count > 0:
-                print(f"⚠️  Found {count} modal/overlay elements: {selector}")
-                # Try to close them
-                for i in range(count):
-                    try:
-                        element = elements.nth(i)
-                        if await element.is_visible():
-                            # Look for close button within modal
-                            close_btn = element.locator('button:has-text("×"), button:has-text("✕"), button:has-text("Close"), button:has-text("Schließen")')
-                            if await close_btn.count() > 0:
-                                await close_btn.first.click()
-                                print(f"✅ Closed modal {i}")
-                                await page.wait_for_timeout(500)
-                    except:
-                        continue
-        except:
-            continue
+    # Check for modals/overlays and close them in another round-trip
+    modals = await page.evaluate(
+        _CLOSE_MODALS_JS, 
+        {"selectors": _MODAL_SELECTORS, "closeTexts": _MODAL_CLOSE_TEXTS}
+    )
+    for modal in modals:
+        print(f"⚠️  Found {modal['count']} modal/overlay elements: {modal['selector']}")
+        for i in modal['closed']:
+            print(f"✅ Closed modal {i}")
+    if any(modal['closed'] for modal in modals):
+        await page.wait_for_timeout(500)
 
 async def find_article_content(page):
     """Find and verify article content."""
     print("🔍 Looking for article content...")
     
+    # Wait once for any article container before checking them one by one
+    try:
+        await page.wait_for_function(
+            _ANY_SELECTOR_PRESENT_JS, arg=_ARTICLE_CONTENT_SELECTORS, timeout=2000
+        )
+    except PlaywrightTimeoutError:
+        print("❌ No article content found")
+        return False
+    
     # Check for article body
-    article_selectors = [
-        '[data-testid="article-body"]',
-        '[data-testid="article-content"]',
-        '.article-body',
-        '.article-content',
-        'article',
-        'main'
-    ]
-    
-    for selector in article_selectors:
+    for selector in _ARTICLE_CONTENT_SELECTORS:
         try:
             elements = page.locator(selector)
             count = await elements.count()
@@ -160,10 +264,9 @@ async def find_article_content(page):
                 # Get some text content
                 for i in range(min(count, 3)):
                     try:
-                        element = elements.nth(i)
-                        text = await element.text_content()
-                        if text:
-                            preview = text[:200].replace('\n', ' ').strip()
+                        # Slice in the browser so only the preview crosses CDP
+                        preview = await elements.nth(i).evaluate(_TEXT_PREVIEW_JS)
+                        if preview:
                             print(f"📄 Content preview {i}: {preview}...")
                     except:
                         continue
@@ -178,48 +281,34 @@ async def navigate_to_article(page):
     """Try to navigate to the actual article content."""
     print("🔍 Trying to navigate to actual article...")
     
-    # Look for article links or navigation
-    article_link_selectors = [
-        'a[href*="/article/"]',
-        'a:has-text("Artikel")',
-        'a:has-text("Article")',
-        'a:has-text("Lesen")',
-        'a:has-text("Read")',
-        'button:has-text("Artikel öffnen")',
-        'button:has-text("Open article")'
-    ]
-    
-    for selector in article_link_selectors:
+    # Enumerate every candidate link with href, text and visibility in one round-trip
+    candidates = await page.evaluate(_DESCRIBE_LINKS_JS, _ARTICLE_LINK_SELECTORS)
+    
+    for selector in dict.fromkeys(c['selector'] for c in candidates):
+        count = sum(1 for c in candidates if c['selector'] == selector)
+        print(f"✅ Found {count} article links: {selector}")
+    
+    for candidate in candidates:
+        if not candidate['visible']:
+            continue
+        i = candidate['index']
         try:
-            elements = page.locator(selector)
-            count = await elements.count()
-            if count > 0:
-                print(f"✅ Found {count} article links: {selector}")
-                for i in range(count):
-                    try:
-                        element = elements.nth(i)
-                        if await element.is_visible():
-                            href = await element.get_attribute('href')
-                            text = await element.text_content()
-                            print(f"📄 Link {i}: {text} -> {href}")
-                            
-                            # Click the link
-                            await element.click()
-                            await page.wait_for_load_state("domcontentloaded", timeout=10000)
-                            
-                            # Check new title
-                            new_title = await page.locator('h1').first.text_content()
-                            print(f"📝 New page title: {new_title}")
-                            
-                            # Take screenshot
-                            await page.screenshot(path=f"debug_after_nav_{i}.png")
-                            print(f"📸 Screenshot after navigation: debug_after_nav_{i}.png")
-                            
-                            return True
-                    except Exception as e:
-                        print(f"⚠️  Error clicking link {i}: {e}")
-                        continue
-        except:
+            print(f"📄 Link {i}: {candidate['text']} -> {candidate['href']}")
+            
+            # Click the link
+            await page.locator(candidate['selector']).nth(i).click()
+            await page.wait_for_load_state("domcontentloaded", timeout=10000)
+            
+            # Check new title
+            new_title = await page.locator('h1').first.text_content()
+            print(f"📝 New page title: {new_title}")
+            
+            # Take screenshot
+            debug_screenshot(page, f"debug_after_nav_{i}.png")
+            
+            return True
+        except Exception as e:
+            print(f"⚠️  Error clicking link {i}: {e}")
             continue
     
     # Look for breadcrumbs or navigation
@@ -243,7 +332,10 @@ async def navigate_to_article(page):
 
 async def main():
     """Main function."""
-    success = await debug_popups()
+    try:
+        success = await debug_popups()
+    finally:
+        await close_shared_auth()
     if success:
         print("✅ Popup debugging completed!")
     else:
@@ -9,8 +9,11 @@ This script is optimized for speed and efficiency using the existing URL list.
 """
 
 import asyncio
+import logging
+import queue
 import re
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import List, Optional, Tuple
 from urllib.parse import urlparse
@@ -18,12 +21,35 @@ from urllib.parse import urlparse
 # Add the amboss package to the path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from amboss.auth import AuthManager
+from playwright.async_api import Error as PlaywrightError
+
+from amboss.auth import AuthManager, close_page
 from amboss.config import settings
 from amboss.expander import ContentExpander, ExpansionFailure
 from amboss.shooter import ScreenshotShooter
 from amboss.validator import ContentValidator, ValidationFailure
 
+# Script output goes through a queue so workers never write to stdout themselves
+log = logging.getLogger("fast_amboss_processor")
+
+# Seconds between rolling progress lines
+PROGRESS_INTERVAL = 1.0
+
+
+def start_log_listener() -> QueueListener:
+    """Route this script's log records to stdout through one writer thread."""
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    
+    log.addHandler(QueueHandler(log_queue))
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    return listener
+
 
 class FastAMBOSSProcessor:
     """Fast processor for AMBOSS articles using existing URL list."""
@@ -39,7 +65,7 @@ class FastAMBOSSProcessor:
         
     def extract_urls_from_file(self, filename: str = "amboss_all_articles_links.txt") -> List[str]:
         """Extract clean URLs from the existing file."""
-        print(f"📖 Reading URLs from {filename}...")
+        log.info(f"📖 Reading URLs from {filename}...")
         
         urls = []
         try:
@@ -68,14 +94,14 @@ class FastAMBOSSProcessor:
                         clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
                         urls.append(clean_url)
             
-            print(f"✅ Extracted {len(urls)} valid article URLs")
+            log.info(f"✅ Extracted {len(urls)} valid article URLs")
             return urls
             
         except FileNotFoundError:
-            print(f"❌ File {filename} not found!")
+            log.error(f"❌ File {filename} not found!")
             return []
         except Exception as e:
-            print(f"❌ Error reading file: {e}")
+            log.error(f"❌ Error reading file: {e}")
             return []
     
     async def process_article(self, url: str, auth_manager: AuthManager) -> Tuple[bool, Optional[str]]:
@@ -89,7 +115,7 @@ class FastAMBOSSProcessor:
                 return False, "Invalid URL format"
             
             slug = match.group(1)
-            print(f"🔄 Processing: {slug}")
+            log.info(f"🔄 Processing: {slug}")
             
             # Create browser context
             context = await auth_manager.create_context()
@@ -111,12 +137,9 @@ class FastAMBOSSProcessor:
                 return False, f"Validation failed: {validation_result.get('errors', [])}"
             
             # Capture screenshots
-            output_dir = settings.output_dir
-            output_dir.mkdir(parents=True, exist_ok=True)
+            screenshots = await self.shooter.shoot_sections(page, slug, f"run_{self.processed_count}", settings.output_dir)
             
-            screenshots = await self.shooter.shoot_sections(page, slug, f"run_{self.processed_count}", output_dir)
-            
-            print(f"✅ Success: {slug} - {len(screenshots)} screenshots captured")
+            log.info(f"✅ Success: {slug} - {len(screenshots)} screenshots captured")
             return True, None
                 
         except ExpansionFailure as e:
@@ -128,49 +151,78 @@ class FastAMBOSSProcessor:
         finally:
             # Always close page and context
             if page:
-                try:
-                    await page.close()
-                except:
-                    pass
+                await close_page(page)
             if context:
                 try:
-                    await context.close()
-                except:
+                    await asyncio.shield(context.close())
+                except PlaywrightError:
                     pass
     
+    async def _report_progress(self, outcomes: "asyncio.Queue[Optional[bool]]", total: int) -> None:
+        """Log a rolling progress summary at most once per PROGRESS_INTERVAL."""
+        loop = asyncio.get_running_loop()
+        done = successful = 0
+        last_report = loop.time()
+        
+        while True:
+            success = await outcomes.get()
+            if success is None:
+                break
+            done += 1
+            successful += success
+            
+            if loop.time() - last_report >= PROGRESS_INTERVAL:
+                log.info(f"📊 Progress: {done}/{total} processed, {successful} successful")
+                last_report = loop.time()
+        
+        log.info(f"📊 Progress: {done}/{total} processed, {successful} successful")
+    
     async def process_all_articles(self, urls: List[str], limit: Optional[int] = None) -> dict:
         """Process all articles with rate limiting."""
-        print(f"🚀 Starting processing of {len(urls)} articles...")
+        log.info(f"🚀 Starting processing of {len(urls)} articles...")
         if limit:
             urls = urls[:limit]
-            print(f"📊 Limited to first {limit} articles")
+            log.info(f"📊 Limited to first {limit} articles")
         
-        # Initialize auth manager
-        async with AuthManager() as auth_manager:
-            # Skip initial auth verification - we'll check on each article
-            print("✅ Authentication manager initialized")
-            
-            # Process articles with rate limiting
-            for i, url in enumerate(urls):
-                self.processed_count += 1
-                
-                success, error = await self.process_article(url, auth_manager)
-                
-                if success:
-                    self.success_count += 1
-                else:
-                    self.failed_count += 1
-                    print(f"❌ Failed: {error}")
-                
-                # Rate limiting - wait between requests
-                if i < len(urls) - 1:  # Don't wait after the last one
-                    delay = settings.min_delay + (settings.max_delay - settings.min_delay) * (i % 10) / 10
-                    print(f"⏳ Waiting {delay:.1f}s before next request...")
-                    await asyncio.sleep(delay)
+        # Create the output root once; shoot_sections adds the per-article dirs
+        settings.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Workers only queue outcomes; one reporter turns them into progress lines
+        outcomes: "asyncio.Queue[Optional[bool]]" = asyncio.Queue()
+        reporter = asyncio.create_task(self._report_progress(outcomes, len(urls)))
+        
+        try:
+            # Initialize auth manager
+            async with AuthManager() as auth_manager:
+                # Skip initial auth verification - we'll check on each article
+                log.info("✅ Authentication manager initialized")
                 
-                # Progress update
-                if (i + 1) % 10 == 0:
-                    print(f"📊 Progress: {i + 1}/{len(urls)} processed")
+                # Process articles with rate limiting
+                for i, url in enumerate(urls):
+                    self.processed_count += 1
+                    
+                    success, error = await self.process_article(url, auth_manager)
+                    
+                    if success:
+                        self.success_count += 1
+                    else:
+                        self.failed_count += 1
+                        log.warning(f"❌ Failed: {error}")
+                    outcomes.put_nowait(success)
+                    
+                    # Rate limiting - wait between requests
+                    if i < len(urls) - 1:  # Don't wait after the last one
+                        delay = settings.min_delay + (settings.max_delay - settings.min_delay) * (i % 10) / 10
+                        log.info(f"⏳ Waiting {delay:.1f}s before next request...")
+                        await asyncio.sleep(delay)
+        finally:
+            try:
+                # Screenshots are written in the background; finish them first
+                await self.shooter.close()
+            finally:
+                # None tells the reporter to print its final line and stop
+                outcomes.put_nowait(None)
+                await reporter
         
         return {
             'total': len(urls),
@@ -183,6 +235,7 @@ class FastAMBOSSProcessor:
 
 async def main():
     """Main function."""
+    listener = start_log_listener()
     try:
         processor = FastAMBOSSProcessor()
         
@@ -190,7 +243,7 @@ async def main():
         urls = processor.extract_urls_from_file()
         
         if not urls:
-            print("❌ No URLs found. Exiting.")
+            log.error("❌ No URLs found. Exiting.")
             return 1
         
         # Process articles (you can set a limit for testing)
@@ -198,19 +251,22 @@ async def main():
         # result = await processor.process_all_articles(urls)  # Process all
         
         # Print results
-        print("\n🎉 Processing completed!")
-        print(f"📊 Results:")
-        print(f"  Total URLs: {result['total']}")
-        print(f"  Processed: {result['processed']}")
-        print(f"  Successful: {result['successful']}")
-        print(f"  Failed: {result['failed']}")
-        print(f"  Success Rate: {result['success_rate']:.1%}")
+        log.info("\n🎉 Processing completed!")
+        log.info(f"📊 Results:")
+        log.info(f"  Total URLs: {result['total']}")
+        log.info(f"  Processed: {result['processed']}")
+        log.info(f"  Successful: {result['successful']}")
+        log.info(f"  Failed: {result['failed']}")
+        log.info(f"  Success Rate: {result['success_rate']:.1%}")
         
         return 0
         
     except Exception as e:
-        print(f"❌ Processing failed: {e}")
+        log.error(f"❌ Processing failed: {e}")
         return 1
+    finally:
+        # Flush whatever is still queued before the process exits
+        listener.stop()
 
 
 if __name__ == "__main__":
@@ -4,7 +4,7 @@ Quick fix to scroll and capture the actual medical content.
 
 import asyncio
 from amboss.auth import AuthManager
-from amboss.expander import ContentExpander
+from amboss.expander import ContentExpander, wait_for_article, wait_for_modals_closed
 
 async def quick_fix():
     """Quick test to get the actual medical content."""
@@ -18,12 +18,12 @@ async def quick_fix():
         try:
             print("🔍 Navigating to article...")
             await page.goto(test_url, wait_until="domcontentloaded", timeout=15000)
-            await asyncio.sleep(3)
+            await wait_for_article(page)
             
             # Handle popups
             expander = ContentExpander()
             await expander._handle_cookie_consent(page)
-            await asyncio.sleep(2)
+            await wait_for_modals_closed(page)
             
             # Scroll down to reveal more content
             print("📜 Scrolling to reveal content...")
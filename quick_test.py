@@ -4,7 +4,7 @@ Quick test to verify improvements work correctly.
 
 import asyncio
 from amboss.auth import AuthManager
-from amboss.expander import ContentExpander
+from amboss.expander import ContentExpander, wait_for_article
 
 async def quick_test():
     """Quick test of the improved system."""
@@ -20,7 +20,7 @@ async def quick_test():
             # Navigate
             print("🔍 Navigating...")
             await page.goto(url, wait_until="domcontentloaded", timeout=15000)
-            await asyncio.sleep(3)
+            await wait_for_article(page)
             
             # Test expansion
             print("🔧 Testing expansion...")
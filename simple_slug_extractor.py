@@ -3,19 +3,29 @@ Simple slug extraction using the known slug list.
 No regex complexity needed!
 """
 
+import os
+import sys
+from functools import lru_cache
+
 def extract_slug_from_url(url):
     """Extract slug from URL using simple string splitting."""
     # Simple approach: take the last part after the last slash
-    return url.split("/")[-1]
+    return url.rpartition("/")[2]
 
 def validate_slug_against_list(slug, known_slugs):
     """Check if a slug is in our known list."""
     return slug in known_slugs
 
 def load_known_slugs(filename="slug_list.txt"):
-    """Load the known slugs from file."""
+    """Load the known slugs from file as a set for O(1) lookups."""
+    # Keyed on mtime so an edited slug list is picked up again
+    return _load_known_slugs(filename, os.path.getmtime(filename))
+
+@lru_cache(maxsize=1)
+def _load_known_slugs(filename, mtime):
+    """Read the slug file once per (filename, mtime)."""
     with open(filename, 'r') as f:
-        return [line.strip() for line in f if line.strip()]
+        return frozenset(sys.intern(line.strip()) for line in f if line.strip())
 
 def test_slug_extraction():
     """Test our simple approach."""
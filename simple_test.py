@@ -4,6 +4,7 @@ Simple test that bypasses complex popup handling.
 
 import asyncio
 from amboss.auth import AuthManager
+from amboss.expander import wait_for_article, wait_for_modals_closed
 
 async def simple_test():
     """Simple test without complex popup handling."""
@@ -17,12 +18,12 @@ async def simple_test():
         try:
             print("🔍 Navigating to article...")
             await page.goto(test_url, wait_until="domcontentloaded", timeout=15000)
-            await asyncio.sleep(3)
+            await wait_for_article(page)
             
             # Simple popup handling - just press Escape
             print("🔧 Simple popup handling...")
             await page.keyboard.press("Escape")
-            await asyncio.sleep(1)
+            await wait_for_modals_closed(page)
             
             # Scroll down to reveal content
             print("📜 Scrolling to reveal content...")
@@ -11,12 +11,56 @@ actual medical article content, not UI elements.
 """
 
 import asyncio
+import re
 from pathlib import Path
 from amboss.auth import AuthManager
 from amboss.config import settings
-from amboss.expander import ContentExpander
+from amboss.expander import ContentExpander, wait_for_article, wait_for_modals_closed
 from amboss.shooter import ScreenshotShooter
 
+# Common popup selectors, joined once into a single CSS selector list
+POPUP_CSS_SELECTOR = ", ".join((
+    # Privacy/cookie consent
+    '[data-testid="cookie-banner"] button',
+    '.cookie-banner button',
+    
+    # Welcome/onboarding popups
+    '[data-testid="close-button"]',
+    '.close-button',
+    '.modal-close',
+    
+    # Any button that might close something
+    'button[aria-label*="close"]',
+    'button[aria-label*="Close"]',
+))
+
+# Cookie consent, welcome and feature tour buttons, matched like :has-text()
+POPUP_BUTTON_TEXT = re.compile(
+    "Akzeptieren|Accept|Schließen|Close|Überspringen|Skip|Weiter|Next",
+    re.IGNORECASE
+)
+POPUP_CLOSE_GLYPHS = re.compile("[×✕]")
+
+# Medical content indicators, scanned in a single pass over the page text
+MEDICAL_TERMS_RE = re.compile("|".join(map(re.escape, (
+    "Diagnostik",
+    "Therapie",
+    "Epidemiologie",
+    "Ätiologie",
+    "Symptome",
+    "Behandlung",
+    "Pränataldiagnostik"
+))))
+
+# UI elements we don't want
+UI_TERMS_RE = re.compile("|".join(map(re.escape, (
+    "Schlüsselfunktionen",
+    "Willkommen",
+    "Datenschutz",
+    "Cookie",
+    "Privacy"
+))))
+
 async def test_popup_handling():
     """Test popup handling and content extraction."""
     test_url = "https://next.amboss.com/de/article/--0D-i"
@@ -32,7 +76,7 @@ async def test_popup_handling():
             # Step 1: Navigate to the article
             print("1. Navigating to article...")
             await page.goto(test_url, wait_until="domcontentloaded", timeout=15000)
-            await asyncio.sleep(3)
+            await wait_for_article(page)
             
             # Step 2: Handle popups systematically
             print("2. Handling popups...")
@@ -53,6 +97,7 @@ async def test_popup_handling():
             
             shooter = ScreenshotShooter()
             screenshots = await shooter.shoot_sections(page, "--0D-i", "test_run", test_dir)
+            await shooter.close()
             
             print(f"   ✅ Captured {len(screenshots)} screenshots")
             for filename, idx, title in screenshots:
@@ -70,89 +115,44 @@ async def test_popup_handling():
 async def handle_all_popups(page):
     """Handle all common popups that might appear."""
     
-    # Common popup selectors
-    popup_selectors = [
-        # Privacy/cookie consent
-        '[data-testid="cookie-banner"] button',
-        '.cookie-banner button',
-        'button:has-text("Akzeptieren")',
-        'button:has-text("Accept")',
-        'button:has-text("Accept All")',
-        'button:has-text("Alle akzeptieren")',
-        
-        # Welcome/onboarding popups
-        'button:has-text("Schließen")',
-        'button:has-text("Close")',
-        '[data-testid="close-button"]',
-        '.close-button',
-        '.modal-close',
-        
-        # Feature tour popups
-        'button:has-text("Überspringen")',
-        'button:has-text("Skip")',
-        'button:has-text("Weiter")',
-        'button:has-text("Next")',
-        
-        # Any button that might close something
-        'button[aria-label*="close"]',
-        'button[aria-label*="Close"]',
-        '[role="button"]:has-text("×")',
-        '[role="button"]:has-text("✕")'
-    ]
+    # One locator for every popup control; a single count() covers the common no-popup case
+    popups = (
+        page.locator(POPUP_CSS_SELECTOR)
+        .or_(page.locator("button").filter(has_text=POPUP_BUTTON_TEXT))
+        .or_(page.locator('[role="button"]').filter(has_text=POPUP_CLOSE_GLYPHS))
+    )
+    if await popups.count() == 0:
+        return
     
-    for selector in popup_selectors:
+    for element in await popups.all():
         try:
-            elements = page.locator(selector)
-            count = await elements.count()
-            if count > 0:
-                for i in range(count):
-                    element = elements.nth(i)
-                    if await element.is_visible():
-                        print(f"   Clicking popup: {selector}")
-                        await element.click()
-                        await asyncio.sleep(1)
+            if await element.is_visible():
+                print(f"   Clicking popup: {await element.text_content()}")
+                await element.click()
+                await asyncio.sleep(1)
         except Exception as e:
             continue
     
-    # Wait a bit for any animations to complete
-    await asyncio.sleep(2)
+    # Wait for any dismissed dialogs to finish closing
+    await wait_for_modals_closed(page)
 
 async def verify_medical_content(page):
     """Verify we're on actual medical content, not UI elements."""
     
-    # Check for medical content indicators
-    medical_indicators = [
-        "Diagnostik",
-        "Therapie",
-        "Epidemiologie", 
-        "Ätiologie",
-        "Symptome",
-        "Behandlung",
-        "Pränataldiagnostik"
-    ]
-    
     # Get page text
-    body_text = await page.locator('body').text_content()
+    body_text = await page.evaluate("() => document.body.textContent")
     
     # Check if any medical terms are present
-    for term in medical_indicators:
-        if term in body_text:
-            print(f"   ✅ Found medical content: {term}")
-            return True
+    match = MEDICAL_TERMS_RE.search(body_text)
+    if match:
+        print(f"   ✅ Found medical content: {match.group()}")
+        return True
     
     # Check for UI elements we don't want
-    ui_indicators = [
-        "Schlüsselfunktionen",
-        "Willkommen",
-        "Datenschutz",
-        "Cookie",
-        "Privacy"
-    ]
-    
-    for term in ui_indicators:
-        if term in body_text:
-            print(f"   ❌ Still showing UI: {term}")
-            return False
+    match = UI_TERMS_RE.search(body_text)
+    if match:
+        print(f"   ❌ Still showing UI: {match.group()}")
+        return False
     
     print("   ⚠️ No clear medical content found")
     return False
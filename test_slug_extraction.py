@@ -2,7 +2,6 @@
 Test slug extraction for the first article URL.
 """
 
-import re
 from amboss.config import settings
 
 def test_slug_extraction():
@@ -17,8 +16,7 @@ def test_slug_extraction():
     print("-" * 50)
     
     # Test the pattern
-    pattern = re.compile(settings.article_pattern)
-    match = pattern.match(test_url)
+    match = settings.article_pattern_compiled.match(test_url)
     
     if match:
         extracted_slug = match.group(1)
@@ -0,0 +1,22 @@
+"""Shared fixtures for the test suite."""
+
+import pytest
+
+from amboss.shooter import ScreenshotShooter
+from amboss.validator import ContentValidator
+
+
+@pytest.fixture
+def shooter():
+    """Create a screenshot shooter per test.
+    
+    Not shared: its background writer queue is bound to the event loop of
+    the first test that writes, and every test gets its own loop.
+    """
+    return ScreenshotShooter()
+
+
+@pytest.fixture(scope="session")
+def validator():
+    """Create one content validator shared by all tests."""
+    return ContentValidator()
@@ -0,0 +1,50 @@
+"""Tests for authentication and context pooling module."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from amboss.auth import ContextPool
+
+
+def _auth_manager():
+    """Create an auth manager whose contexts take a moment to create."""
+    async def create_context():
+        await asyncio.sleep(0)
+        return AsyncMock()
+    
+    auth_manager = MagicMock()
+    auth_manager.create_context = AsyncMock(side_effect=create_context)
+    return auth_manager
+
+
+@pytest.mark.asyncio
+async def test_concurrent_acquire_stays_within_size():
+    """Test concurrent first acquires never create more than size contexts."""
+    auth_manager = _auth_manager()
+    pool = ContextPool(auth_manager, size=2, max_pages=10)
+    
+    acquires = [asyncio.create_task(pool.acquire()) for _ in range(4)]
+    await asyncio.sleep(0.01)
+    for context in list(pool.contexts):
+        await pool.release(context)
+    await asyncio.gather(*acquires)
+    
+    assert auth_manager.create_context.await_count == 2
+    assert len(pool.contexts) == 2
+
+
+@pytest.mark.asyncio
+async def test_release_recycles_in_place():
+    """Test a worn-out context is replaced without freeing its slot."""
+    auth_manager = _auth_manager()
+    pool = ContextPool(auth_manager, size=1, max_pages=1)
+    
+    old = await pool.acquire()
+    await pool.release(old)
+    new = await pool.acquire()
+    
+    assert new is not old
+    old.close.assert_awaited_once()
+    assert pool.contexts == [new]
@@ -0,0 +1,109 @@
+"""Tests for adaptive concurrency control module."""
+
+import time
+
+import pytest
+
+from amboss.backpressure import AIMD, RateLimitWindow, TokenBucket, parse_retry_after
+
+
+@pytest.fixture
+def aimd():
+    """Create an AIMD controller with a small ceiling."""
+    return AIMD(max_limit=4, target_latency=8.0, breaker_cooldown=0.0)
+
+
+def test_on_success_increases_limit(aimd):
+    """Test additive increase on fast navigations."""
+    aimd.on_success(1.0)
+    aimd.on_success(1.0)
+
+    assert aimd.limit == 2.0
+
+
+def test_limit_capped_at_max(aimd):
+    """Test the limit never exceeds max_limit."""
+    for _ in range(20):
+        aimd.on_success(1.0)
+
+    assert aimd.limit == 4.0
+
+
+def test_slow_response_decreases_limit(aimd):
+    """Test multiplicative decrease when latency exceeds the target."""
+    aimd.limit = 4.0
+    aimd.on_success(20.0)
+
+    assert aimd.limit == 2.0
+
+
+def test_on_error_never_below_min(aimd):
+    """Test multiplicative decrease is floored at min_limit."""
+    for _ in range(5):
+        aimd.on_error()
+
+    assert aimd.limit == 1.0
+
+
+@pytest.mark.asyncio
+async def test_acquire_and_release(aimd):
+    """Test slots are tracked through the async context manager."""
+    async with aimd:
+        assert aimd.active == 1
+
+    assert aimd.active == 0
+
+
+def test_parse_retry_after():
+    """Test Retry-After header parsing."""
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+
+
+@pytest.mark.asyncio
+async def test_rate_window_retry_after_pauses():
+    """Test Retry-After blocks workers until the pause expires."""
+    window = RateLimitWindow(default_limit=30)
+    window.observe({"retry-after": "0.05"})
+
+    assert not window._open.is_set()
+    await window.wait()
+    assert window._open.is_set()
+    assert window.requests_in_window == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_window_low_remaining_pauses():
+    """Test a nearly exhausted budget pauses, a healthy one does not."""
+    window = RateLimitWindow(default_limit=30)
+    window.observe({"x-ratelimit-remaining": "20", "x-ratelimit-limit": "30"})
+    assert window._open.is_set()
+
+    window.observe({"x-ratelimit-remaining": "1"})
+    assert not window._open.is_set()
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_requests():
+    """Test the second token waits for the refill interval."""
+    bucket = TokenBucket(rate=20.0)
+
+    start = time.monotonic()
+    await bucket.acquire()
+    assert time.monotonic() - start < 0.02
+
+    await bucket.acquire()
+    assert time.monotonic() - start >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_credits_elapsed_work():
+    """Test time spent working counts towards the next token."""
+    bucket = TokenBucket(rate=20.0)
+    await bucket.acquire()
+
+    time.sleep(0.06)
+    start = time.monotonic()
+    await bucket.acquire()
+    assert time.monotonic() - start < 0.02
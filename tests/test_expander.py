@@ -3,6 +3,8 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 
+from tenacity import wait_none
+
 from amboss.expander import ContentExpander, ExpansionFailure
 
 
@@ -11,14 +13,16 @@ def mock_page():
     """Create a mock Playwright page."""
     page = AsyncMock()
     
-    # Mock locator methods
-    locator = AsyncMock()
-    locator.count.return_value = 2
-    locator.nth.return_value = AsyncMock()
-    locator.nth().is_visible.return_value = True
-    locator.nth().click = AsyncMock()
+    # Mock locator methods; locator() is synchronous, its queries are not
+    element = AsyncMock()
+    element.is_visible.return_value = True
+    
+    locator = MagicMock()
+    locator.count = AsyncMock(return_value=2)
+    locator.evaluate_all = AsyncMock(return_value=[0, 1])  # indices of visible matches
+    locator.nth = MagicMock(return_value=element)
     
-    page.locator.return_value = locator
+    page.locator = MagicMock(return_value=locator)
     page.wait_for_timeout = AsyncMock()
     page.evaluate = AsyncMock()
     page.wait_for_load_state = AsyncMock()
@@ -33,6 +37,7 @@ async def test_fully_expand_success(mock_page):
     
     # Mock successful expansion
     mock_page.locator().count.return_value = 0  # No hidden elements after expansion
+    mock_page.locator().evaluate_all.return_value = []
     
     await expander.fully_expand(mock_page)
     
@@ -42,13 +47,16 @@ async def test_fully_expand_success(mock_page):
 
 
 @pytest.mark.asyncio
-async def test_fully_expand_failure(mock_page):
+async def test_fully_expand_failure(mock_page, monkeypatch):
     """Test expansion failure with remaining hidden elements."""
     expander = ContentExpander()
     
+    # Retry immediately instead of backing off between attempts
+    monkeypatch.setattr(ContentExpander.fully_expand.retry, "wait", wait_none())
+    
     # Mock remaining hidden elements
     mock_page.locator().count.return_value = 1
-    mock_page.locator().nth().is_visible.return_value = True
+    mock_page.locator().evaluate_all.return_value = [0]
     
     with pytest.raises(ExpansionFailure):
         await expander.fully_expand(mock_page)
@@ -73,7 +81,7 @@ async def test_is_fully_expanded_false(mock_page):
     
     # Mock hidden elements
     mock_page.locator().count.return_value = 1
-    mock_page.locator().nth().is_visible.return_value = True
+    mock_page.locator().evaluate_all.return_value = [0]
     
     result = await expander.is_fully_expanded(mock_page)
     assert result is False
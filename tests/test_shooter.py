@@ -1,37 +1,62 @@
 """Tests for screenshot capture module."""
 
+import copy
+import functools
+import io
+
 import pytest
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock
 
-from amboss.shooter import ScreenshotShooter
+from PIL import Image
+from playwright.async_api import Page
 
+from amboss.config import settings
 
-@pytest.fixture
-def mock_page():
-    """Create a mock Playwright page."""
-    page = AsyncMock()
+# Filename sanitization inputs and their expected results
+_SANITIZE_CASES = (
+    ("Normal Text", "Normal Text"),
+    ("Text with <invalid> chars", "Text with _invalid_ chars"),  # invalid characters
+    ("Text with dots...", "Text with dots"),  # trailing dots
+    ("", "section"),  # empty text
+)
+
+
+@functools.cache
+def _template_page():
+    """Build the mock Playwright page tree once; fixtures hand out deep copies."""
+    page = AsyncMock(spec=Page)
     
     # Mock viewport
     page.viewport_size = {"width": 1280, "height": 720}
     
-    # Mock header elements
-    header = AsyncMock()
-    header.text_content.return_value = "Test Section"
-    header.bounding_box.return_value = {"x": 0, "y": 100, "width": 1280, "height": 50}
-    header.scroll_into_view_if_needed = AsyncMock()
+    # Mock section layout measured in the page
+    page.evaluate.return_value = {
+        "headers": [{"y": 100, "title": "Test Section"}],
+        "pageHeight": 2000
+    }
     
-    # Mock locator for headers
-    locator = AsyncMock()
-    locator.count.return_value = 1
-    locator.nth.return_value = header
-    
-    page.locator.return_value = locator
-    page.screenshot = AsyncMock()
+    # Mock screenshot as a real PNG of the content column
+    buffer = io.BytesIO()
+    Image.new("RGB", (848, 1200), "white").save(buffer, "PNG")
+    page.screenshot.return_value = buffer.getvalue()
     
     return page
 
 
+@pytest.fixture
+def mock_page():
+    """Create a mock Playwright page."""
+    # Deep copies keep per-test overrides from leaking into the template
+    return copy.deepcopy(_template_page())
+
+
+@pytest.fixture(autouse=True)
+def no_settle_delay(monkeypatch):
+    """Skip the fixed settle delay after scrolling."""
+    monkeypatch.setattr("amboss.shooter.asyncio.sleep", AsyncMock())
+
+
 @pytest.fixture
 def temp_dir(tmp_path):
     """Create a temporary directory for test files."""
@@ -39,83 +64,122 @@ def temp_dir(tmp_path):
 
 
 @pytest.mark.asyncio
-async def test_shoot_sections_with_headers(mock_page, temp_dir):
+async def test_shoot_sections_with_headers(mock_page, temp_dir, shooter):
     """Test screenshot capture with section headers."""
-    shooter = ScreenshotShooter()
-    
-    # Mock successful screenshot
-    mock_page.screenshot.return_value = None
-    
     result = await shooter.shoot_sections(mock_page, "test-slug", "test-run", temp_dir)
+    await shooter.close()
     
     assert len(result) == 1
-    assert result[0][0].endswith(".png")  # filename
+    assert result[0][0] == "sec_000_Test Section.png"  # filename
     assert result[0][1] == 0  # index
-    assert result[0][2] == "Test_Section"  # section title
+    assert result[0][2] == "Test Section"  # section title
+    assert (temp_dir / "test-slug" / "test-run" / result[0][0]).exists()
+    
+    # One capture, clipped to the section span in the content column
+    clip = mock_page.screenshot.call_args.kwargs["clip"]
+    assert clip["y"] == 50
+    assert clip["height"] == 1200
 
 
 @pytest.mark.asyncio
-async def test_shoot_sections_no_headers(mock_page, temp_dir):
-    """Test screenshot capture when no headers are found."""
-    shooter = ScreenshotShooter()
+async def test_wait_for_writes_covers_one_slug(mock_page, temp_dir, shooter):
+    """Test the collected write futures resolve once the slug's files are on disk."""
+    writes = []
+    result = await shooter.shoot_sections(mock_page, "test-slug", "test-run", temp_dir, writes=writes)
     
-    # Mock no headers
-    mock_page.locator().count.return_value = 0
-    mock_page.screenshot.return_value = None
+    await shooter.wait_for_writes(writes)
     
-    result = await shooter.shoot_sections(mock_page, "test-slug", "test-run", temp_dir)
+    assert len(writes) == len(result) == 1
+    assert (temp_dir / "test-slug" / "test-run" / result[0][0]).exists()
+    await shooter.close()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_writes_raises_on_write_error(mock_page, temp_dir, shooter, monkeypatch):
+    """Test a failed background write surfaces to the caller."""
+    monkeypatch.setattr(Path, "write_bytes", MagicMock(side_effect=OSError("disk full")))
+    writes = []
+    await shooter.shoot_sections(mock_page, "test-slug", "test-run", temp_dir, writes=writes)
     
-    assert len(result) == 1
-    assert result[0][0] == "full_page_test-slug.png"
-    assert result[0][1] == 0
-    assert result[0][2] == "full_page"
+    with pytest.raises(OSError, match="disk full"):
+        await shooter.wait_for_writes(writes)
+    await shooter.close()
 
 
 @pytest.mark.asyncio
-async def test_sanitize_filename():
-    """Test filename sanitization."""
-    shooter = ScreenshotShooter()
+async def test_shoot_sections_skips_failed_tile(mock_page, temp_dir, shooter):
+    """Test a failed tile capture only drops its own sections."""
+    mock_page.evaluate.return_value = {
+        "headers": [{"y": 100, "title": "First"}, {"y": 1300, "title": "Second"}],
+        "pageHeight": 4000
+    }
+    png = mock_page.screenshot.return_value
+    mock_page.screenshot.side_effect = [Exception("capture failed"), png]
+    # Force one tile per section
+    shooter._plan_tiles = lambda spans: [(top, bottom, [i]) for i, (top, bottom) in enumerate(spans)]
     
-    # Test normal text
-    assert shooter._sanitize_filename("Normal Text") == "Normal Text"
+    result = await shooter.shoot_sections(mock_page, "test-slug", "test-run", temp_dir)
+    await shooter.close()
     
-    # Test with invalid characters
-    assert shooter._sanitize_filename("Text with <invalid> chars") == "Text with _invalid_ chars"
+    assert [(r[1], r[2]) for r in result] == [(1, "Second")]
+
+
+def test_plan_tiles_caps_capture_height(shooter):
+    """Test tall articles are split into several capture tiles."""
+    spans = [(i * 1000.0, i * 1000.0 + 1000) for i in range(18)]
     
-    # Test with dots
-    assert shooter._sanitize_filename("Text with dots...") == "Text with dots"
+    tiles = shooter._plan_tiles(spans)
     
-    # Test empty text
-    assert shooter._sanitize_filename("") == "section"
+    max_height = 8192 / settings.device_scale_factor
+    assert len(tiles) > 1
+    assert all(bottom - top <= max_height for top, bottom, _ in tiles)
+    assert [i for _, _, indices in tiles for i in indices] == list(range(18))
 
 
 @pytest.mark.asyncio
-async def test_calculate_section_clip():
-    """Test section clip calculation."""
-    shooter = ScreenshotShooter()
+async def test_shoot_sections_no_headers(mock_page, temp_dir, shooter):
+    """Test screenshot capture when no headers are found."""
+    # Mock no headers
+    mock_page.evaluate.return_value = {"headers": [], "pageHeight": 2000}
     
+    result = await shooter.shoot_sections(mock_page, "test-slug", "test-run", temp_dir)
+    await shooter.close()
+    
+    # The content area is captured in chunks instead
+    assert [r[0] for r in result] == [
+        "content_chunk_000_test-slug.png",
+        "content_chunk_001_test-slug.png"
+    ]
+    assert [r[1] for r in result] == [0, 1]
+    assert result[0][2] == "content_chunk_0"
+    assert all((temp_dir / "test-slug" / "test-run" / r[0]).exists() for r in result)
+
+
+@pytest.mark.parametrize("text,expected", _SANITIZE_CASES)
+def test_sanitize_filename(shooter, text, expected):
+    """Test filename sanitization."""
+    assert shooter._sanitize_filename(text) == expected
+
+
+@pytest.mark.parametrize("index,expected_height", [
+    (0, 720),  # first section: min(1200, viewport["height"])
+    (1, 720),  # subsequent section: min(1000, viewport["height"])
+])
+def test_calculate_section_clip(shooter, index, expected_height):
+    """Test section clip calculation."""
     header_bbox = {"x": 0, "y": 100, "width": 1280, "height": 50}
     viewport = {"width": 1280, "height": 720}
     
-    # Test first section
-    clip = shooter._calculate_section_clip(header_bbox, viewport, 0)
+    clip = shooter._calculate_section_clip(header_bbox, viewport, index)
     assert clip["x"] == 0
     assert clip["y"] == 50  # header_bbox["y"] - 50
     assert clip["width"] == 1280
-    assert clip["height"] == 720  # min(1200, viewport["height"])
-    
-    # Test subsequent section
-    clip = shooter._calculate_section_clip(header_bbox, viewport, 1)
-    assert clip["height"] == 720  # min(1000, viewport["height"])
+    assert clip["height"] == expected_height
 
 
 @pytest.mark.asyncio
-async def test_get_screenshot_metrics(mock_page):
+async def test_get_screenshot_metrics(mock_page, shooter):
     """Test screenshot metrics calculation."""
-    shooter = ScreenshotShooter()
-    
-    # Mock various content elements
-    mock_page.locator.side_effect = lambda selector: AsyncMock(count=AsyncMock(return_value=1))
     mock_page.evaluate.return_value = 1000  # page height
     
     metrics = await shooter.get_screenshot_metrics(mock_page)
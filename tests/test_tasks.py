@@ -0,0 +1,85 @@
+"""Tests for task orchestration module."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from tenacity import wait_none
+
+from amboss.backpressure import TransientError
+from amboss.tasks import ScrapingTask, _is_transient
+
+
+def test_is_transient():
+    """Test only timeouts, server errors and network failures are retried."""
+    assert _is_transient(PlaywrightTimeoutError("Timeout 15000ms exceeded"))
+    assert _is_transient(TransientError("Server error 503"))
+    assert _is_transient(PlaywrightError("net::ERR_CONNECTION_RESET at https://next.amboss.com"))
+    assert not _is_transient(PlaywrightError("Target page, context or browser has been closed"))
+    assert not _is_transient(ValueError("net::ERR_CONNECTION_RESET"))
+
+
+@pytest.mark.asyncio
+async def test_navigate_retries_network_error(monkeypatch):
+    """Test a connection reset during navigation is retried."""
+    monkeypatch.setattr(ScrapingTask._navigate_to_page.retry, "wait", wait_none())
+    task = ScrapingTask()
+    
+    response = MagicMock(status=200, headers={})
+    page = AsyncMock()
+    page.goto.side_effect = [
+        PlaywrightError("net::ERR_CONNECTION_RESET at https://next.amboss.com"),
+        response
+    ]
+    
+    await task._navigate_to_page(page, "https://next.amboss.com")
+    
+    assert page.goto.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_navigate_network_error_reduces_concurrency(monkeypatch):
+    """Test a network failure during navigation backs off the AIMD limit."""
+    monkeypatch.setattr(ScrapingTask._navigate_to_page.retry, "wait", wait_none())
+    task = ScrapingTask()
+    task.aimd.on_error = MagicMock()
+    
+    page = AsyncMock()
+    page.goto.side_effect = [
+        PlaywrightError("net::ERR_CONNECTION_RESET at https://next.amboss.com"),
+        MagicMock(status=200, headers={})
+    ]
+    
+    await task._navigate_to_page(page, "https://next.amboss.com")
+    
+    task.aimd.on_error.assert_called_once_with()
+    assert task.aimd.active == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_batch_releases_unfinished_claims():
+    """Test slugs still in flight when a batch is cancelled go back to pending."""
+    task = ScrapingTask()
+    started = asyncio.Event()
+    
+    async def process_slug(slug, url, run_id):
+        if slug == "fast":
+            return True, None
+        started.set()
+        await asyncio.sleep(3600)
+    
+    task.process_slug = process_slug
+    db = AsyncMock()
+    rows = [("fast", "https://a"), ("slow", "https://b")]
+    
+    batch = asyncio.create_task(task._process_rows(db, rows, "run"))
+    await started.wait()
+    batch.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await batch
+    
+    db.finalize_batch.assert_awaited_once_with("run", [("fast", True, None)])
+    db.release_claims.assert_awaited_once_with("run", ["slow"])